@@ -0,0 +1,127 @@
+import asyncio
+import json
+import re
+from typing import Any, List, Optional
+import ijson
+import orjson
+from app.core import cached_invoke
+
+# Matches the first fenced JSON block, or a bare object/array when the model
+# skipped the fence entirely. Compiled once; shared by every agent parser.
+_FENCE = re.compile(
+    r"```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```|(\{.*\}|\[.*\])",
+    re.DOTALL,
+)
+
+
+def extract_json(text: str) -> Any:
+    """Extract and parse the first JSON object/array embedded in LLM output.
+
+    Tolerates prose before/after the payload and optional ``` fences, which
+    the old split-on-backticks parsers silently choked on. Parses with
+    orjson - large responses decode 2-5x faster than with stdlib json.
+    """
+    match = _FENCE.search(text)
+    if not match:
+        raise json.JSONDecodeError("no JSON object or array found", text, 0)
+    return orjson.loads(match.group(1) or match.group(2))
+
+
+async def invoke_for_json_stream(
+    bedrock,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+) -> List[Any]:
+    """Stream a Claude response and parse its JSON array incrementally.
+
+    Items materialize as each closing brace arrives, so parsing overlaps
+    with network receive instead of stalling on the final token. If the
+    stream cannot be parsed incrementally (prose, fences mid-payload),
+    the buffered response is handed to extract_json as a fallback.
+    """
+    items = ijson.sendable_list()
+    coro = ijson.items_coro(items, 'item')
+    collected: List[Any] = []
+    buffered: List[str] = []
+    prefix = ''
+    started = False
+    failed = False
+
+    async for chunk in bedrock.invoke_claude_stream(
+        prompt,
+        system_prompt=system_prompt,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    ):
+        buffered.append(chunk)
+        if failed:
+            continue
+        if not started:
+            # Skip any prose/fence prefix up to the opening bracket
+            prefix += chunk
+            start = prefix.find('[')
+            if start == -1:
+                continue
+            chunk = prefix[start:]
+            started = True
+        try:
+            coro.send(chunk.encode())
+        except Exception:
+            failed = True
+            continue
+        if items:
+            collected.extend(items)
+            del items[:]
+
+    if started and not failed:
+        try:
+            coro.close()
+        except Exception:
+            pass
+        collected.extend(items)
+        if collected:
+            return collected
+
+    return extract_json(''.join(buffered))
+
+
+async def invoke_for_json(
+    bedrock,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+) -> Any:
+    """Invoke Claude and parse its JSON output, retrying once with feedback.
+
+    On a parse failure the model is re-invoked with the decode error appended
+    so it can correct its own formatting; a second failure propagates the
+    JSONDecodeError to the caller.
+    """
+    response = await cached_invoke(
+        bedrock,
+        prompt,
+        system_prompt=system_prompt,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+    try:
+        return extract_json(response)
+    except json.JSONDecodeError as exc:
+        await asyncio.sleep(1)
+        retry_prompt = (
+            f"{prompt}\n\n"
+            f"Your previous output could not be parsed ({exc}). "
+            f"Return ONLY valid JSON with no surrounding text."
+        )
+        response = await cached_invoke(
+            bedrock,
+            retry_prompt,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        return extract_json(response)
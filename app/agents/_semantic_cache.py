@@ -0,0 +1,44 @@
+from typing import Any, List, Optional
+import numpy as np
+
+
+class SemanticCache:
+    """In-memory embedding-keyed cache with cosine-similarity lookup.
+
+    Near-duplicate inputs ("Attention Mechanism" vs "Self-Attention") hash
+    to different exact-match keys but embed close together, so lookups that
+    clear the similarity threshold reuse the stored value instead of paying
+    for another LLM call. Vectors are L2-normalized on insert, making each
+    lookup a single matrix-vector dot product.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 512):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None
+        self._values: List[Any] = []
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def get(self, embedding) -> Optional[Any]:
+        """Return the cached value most similar to embedding, or None."""
+        if self._vectors is None:
+            return None
+        sims = self._vectors @ self._normalize(embedding)
+        best = int(np.argmax(sims))
+        if sims[best] > self.threshold:
+            return self._values[best]
+        return None
+
+    def put(self, embedding, value: Any) -> None:
+        """Store value under embedding, evicting the oldest entry when full."""
+        vec = self._normalize(embedding)[None, :]
+        self._vectors = vec if self._vectors is None else np.vstack([self._vectors, vec])
+        self._values.append(value)
+        if len(self._values) > self.max_entries:
+            self._vectors = self._vectors[1:]
+            self._values.pop(0)
@@ -1,9 +1,26 @@
 from typing import TypedDict, List, Optional, Dict, Any
 from langgraph.graph import StateGraph, END
-from app.core import get_bedrock_service, get_neo4j_service
+from app.core import get_bedrock_service, get_neo4j_service, truncate_to_tokens
+from app.core.config import get_settings
+from app.agents._json_utils import invoke_for_json, invoke_for_json_stream
+from app.agents._semantic_cache import SemanticCache
 from app.services import get_pdf_processor
+import asyncio
+import heapq
+import itertools
 import json
-import random
+import numpy as np
+
+settings = get_settings()
+
+# Bound concurrent Bedrock calls so parallel fan-out stays within rate limits
+BEDROCK_CONCURRENCY = asyncio.Semaphore(5)
+
+# Near-duplicate concept pairs reuse earlier hypotheses instead of hitting Claude
+_HYPOTHESIS_CACHE = SemanticCache(threshold=settings.SEMANTIC_CACHE_THRESHOLD)
+
+# logical, testability, novelty, significance
+_CONFIDENCE_WEIGHTS = np.array([0.3, 0.3, 0.2, 0.2])
 
 
 class HypothesisState(TypedDict):
@@ -18,173 +35,271 @@ class HypothesisState(TypedDict):
 
 
 async def extract_concepts(state: HypothesisState) -> HypothesisState:
-    """Extract key concepts from papers."""
+    """Extract key concepts from papers (one concurrent call per paper)."""
     bedrock = get_bedrock_service()
-    all_concepts = []
-    
-    for paper in state['papers']:
+
+    async def _extract_one(paper: Dict[str, Any]) -> List[Dict[str, str]]:
         prompt = f"""Extract the key concepts, theories, methods, and findings from this academic content.
-        
+
         Content:
-        {paper['content'][:20000]}
-        
+        {truncate_to_tokens(paper['content'], 8000)}
+
         Return a JSON array of concepts, each with:
         - name: concept name
         - type: theory, method, finding, or phenomenon
         - description: brief description
         - domain: field of study
-        
+
         Return ONLY the JSON array."""
-        
-        response = await bedrock.invoke_claude(
-            prompt,
-            system_prompt="You are an expert academic concept extractor.",
-            max_tokens=2000,
-        )
-        
+
         try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            concepts = json.loads(response)
-            for c in concepts:
-                c['source_paper'] = paper.get('id', 'unknown')
-            all_concepts.extend(concepts)
+            # Stream so concepts parse while the tail is still generating
+            async with BEDROCK_CONCURRENCY:
+                concepts = await invoke_for_json_stream(
+                    bedrock,
+                    prompt,
+                    system_prompt="You are an expert academic concept extractor.",
+                    max_tokens=2000,
+                )
         except json.JSONDecodeError:
+            return []
+
+        for c in concepts:
+            c['source_paper'] = paper.get('id', 'unknown')
+        return concepts
+
+    results = await asyncio.gather(
+        *[_extract_one(paper) for paper in state['papers']],
+        return_exceptions=True,
+    )
+
+    all_concepts = []
+    for result in results:
+        if not isinstance(result, BaseException):
+            all_concepts.extend(result)
+
+    # Canonicalize by case-folded name: the same concept extracted from
+    # several papers becomes one entry with merged domains/source papers,
+    # so pairing never wastes an LLM call on a concept versus itself
+    by_name: Dict[str, Dict[str, Any]] = {}
+    for c in all_concepts:
+        name = (c.get('name') or '').strip()
+        if not name:
             continue
-    
-    return {**state, "concepts": all_concepts, "status": "concepts_extracted"}
+        merged = by_name.get(name.lower())
+        if merged is None:
+            merged = {
+                'name': name,
+                'type': c.get('type'),
+                'description': c.get('description', ''),
+                'domains': set(),
+                'source_papers': set(),
+            }
+            by_name[name.lower()] = merged
+        if c.get('domain'):
+            merged['domains'].add(c['domain'])
+        if c.get('source_paper'):
+            merged['source_papers'].add(c['source_paper'])
+        if not merged['description'] and c.get('description'):
+            merged['description'] = c['description']
+
+    return {"concepts": list(by_name.values()), "status": "concepts_extracted"}
+
+
+MAX_CONCEPT_PAIRS = 10
 
 
 async def create_concept_pairs(state: HypothesisState) -> HypothesisState:
-    """Create interesting concept pairs for hypothesis generation."""
+    """Create interesting concept pairs for hypothesis generation.
+
+    Scores every candidate combination by how "cross" it is (disjoint
+    domains + disjoint source papers) and keeps the MAX_CONCEPT_PAIRS best
+    with a bounded heap, so selection is deterministic and costs
+    O(N^2 log K) instead of materializing and shuffling all O(N^2) pairs.
+    """
     concepts = state['concepts']
-    pairs = []
-    
-    # Create pairs from different papers/domains
-    for i, c1 in enumerate(concepts):
-        for c2 in concepts[i+1:]:
-            # Prefer cross-domain pairs
-            if c1.get('domain') != c2.get('domain') or c1.get('source_paper') != c2.get('source_paper'):
-                pairs.append((c1, c2))
-    
-    # Limit to top pairs (can add scoring logic)
-    random.shuffle(pairs)
-    pairs = pairs[:10]
-    
-    return {**state, "concept_pairs": pairs, "status": "pairs_created"}
+
+    # Precompute the filter fields once so the inner loop is cheap set checks
+    domains = [c.get('domains') or set() for c in concepts]
+    papers = [c.get('source_papers') or set() for c in concepts]
+
+    scored = (
+        (domains[i].isdisjoint(domains[j]) + papers[i].isdisjoint(papers[j]), i, j)
+        for i, j in itertools.combinations(range(len(concepts)), 2)
+    )
+    top = heapq.nlargest(MAX_CONCEPT_PAIRS, (entry for entry in scored if entry[0]))
+
+    pairs = [(concepts[i], concepts[j]) for _, i, j in top]
+
+    return {"concept_pairs": pairs, "status": "pairs_created"}
 
 
 async def generate_hypotheses(state: HypothesisState) -> HypothesisState:
-    """Generate novel research hypotheses from concept pairs."""
+    """Generate novel research hypotheses from concept pairs (concurrently)."""
     bedrock = get_bedrock_service()
-    hypotheses = []
-    
-    for c1, c2 in state['concept_pairs'][:5]:  # Limit for API calls
+
+    async def _generate_one(c1: Dict[str, str], c2: Dict[str, str]) -> Optional[Dict[str, Any]]:
         prompt = f"""You are a research hypothesis generator using a genetic algorithm-inspired approach.
-        
+
         Concept 1: {c1['name']}
         Description: {c1.get('description', 'N/A')}
-        Domain: {c1.get('domain', 'N/A')}
-        
+        Domain: {', '.join(sorted(c1.get('domains', []))) or 'N/A'}
+
         Concept 2: {c2['name']}
         Description: {c2.get('description', 'N/A')}
-        Domain: {c2.get('domain', 'N/A')}
-        
+        Domain: {', '.join(sorted(c2.get('domains', []))) or 'N/A'}
+
         Generate a novel, testable research hypothesis that connects these two concepts in an unexpected way.
         Think about:
         - How might these concepts interact?
         - What unexplored relationship might exist?
         - What would be a surprising but plausible connection?
-        
+
         Return a JSON object with:
         - title: A compelling thesis title (max 15 words)
         - description: Detailed hypothesis explanation (100-200 words)
         - methodology_hints: Array of suggested research methods
         - novelty_explanation: Why this is novel
         - confidence: Your confidence score (0-1)
-        
+
         Return ONLY the JSON object."""
-        
-        response = await bedrock.invoke_claude(
-            prompt,
-            system_prompt="You are a creative research hypothesis generator.",
-            max_tokens=1500,
+
+        # Semantic cache: near-identical pairs reuse a prior hypothesis
+        pair_text = (
+            f"{c1['name']} {c1.get('description', '')}"
+            f" || {c2['name']} {c2.get('description', '')}"
         )
-        
+        embedding = None
         try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            hypothesis = json.loads(response)
-            hypothesis['source_concepts'] = [c1['name'], c2['name']]
-            hypotheses.append(hypothesis)
+            embedding = (await bedrock.get_embeddings([pair_text]))[0]
+            cached = _HYPOTHESIS_CACHE.get(embedding)
+            if cached is not None:
+                hypothesis = dict(cached)
+                hypothesis['source_concepts'] = [c1['name'], c2['name']]
+                return hypothesis
+        except Exception:
+            pass  # Embedding failures fall through to the LLM call
+
+        try:
+            async with BEDROCK_CONCURRENCY:
+                hypothesis = await invoke_for_json(
+                    bedrock,
+                    prompt,
+                    system_prompt="You are a creative research hypothesis generator.",
+                    max_tokens=1500,
+                )
         except json.JSONDecodeError:
-            continue
-    
-    return {**state, "hypotheses": hypotheses, "status": "hypotheses_generated"}
+            return None
+
+        hypothesis['source_concepts'] = [c1['name'], c2['name']]
+        if embedding is not None:
+            _HYPOTHESIS_CACHE.put(embedding, hypothesis)
+        return hypothesis
+
+    # The semaphore is the real API throttle; the settings cap only bounds cost
+    pairs = state['concept_pairs'][:settings.MAX_HYPOTHESES_PER_RUN]
+    results = await asyncio.gather(
+        *[_generate_one(c1, c2) for c1, c2 in pairs],
+        return_exceptions=True,
+    )
+
+    hypotheses = [r for r in results if r is not None and not isinstance(r, BaseException)]
+
+    return {"hypotheses": hypotheses, "status": "hypotheses_generated"}
+
+
+VALIDATION_BATCH_SIZE = 5
 
 
 async def validate_hypotheses(state: HypothesisState) -> HypothesisState:
-    """Validate hypotheses for logical consistency and novelty."""
+    """Validate hypotheses for logical consistency and novelty.
+
+    Hypotheses are validated in batches of VALIDATION_BATCH_SIZE per Claude
+    call (batches run concurrently), cutting N round-trips to ceil(N/B) and
+    keeping the static instructions as a cache-friendly shared prefix.
+    """
     bedrock = get_bedrock_service()
-    validated = []
-    
-    for hyp in state['hypotheses']:
-        prompt = f"""Evaluate this research hypothesis for:
+    hypotheses = state['hypotheses']
+
+    async def _validate_batch(batch: List[tuple]) -> List[Dict[str, Any]]:
+        payload = json.dumps(
+            [{"id": idx, "title": h['title'], "description": h['description']} for idx, h in batch],
+            separators=(",", ":"),
+        )
+        prompt = f"""Evaluate each research hypothesis below for:
         1. Logical consistency (is it self-contradictory?)
         2. Testability (can it be empirically tested?)
         3. Novelty (is it genuinely new?)
         4. Significance (would it matter if true?)
-        
-        Hypothesis: {hyp['title']}
-        Description: {hyp['description']}
-        
-        Return a JSON object with:
+
+        Return a JSON array with one object per hypothesis, each with:
+        - id: the hypothesis id you were given
         - is_valid: boolean
         - logical_score: 0-1
         - testability_score: 0-1
         - novelty_score: 0-1
         - significance_score: 0-1
         - feedback: brief improvement suggestions
-        
-        Return ONLY the JSON object."""
-        
-        response = await bedrock.invoke_claude(
-            prompt,
-            system_prompt="You are a rigorous research hypothesis validator.",
-            max_tokens=500,
-        )
-        
+
+        Return ONLY the JSON array.
+
+        Hypotheses:
+        {payload}"""
+
         try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            validation = json.loads(response)
-            
-            if validation.get('is_valid', False):
-                hyp['validation'] = validation
-                hyp['confidence'] = (
-                    validation.get('logical_score', 0) * 0.3 +
-                    validation.get('testability_score', 0) * 0.3 +
-                    validation.get('novelty_score', 0) * 0.2 +
-                    validation.get('significance_score', 0) * 0.2
+            async with BEDROCK_CONCURRENCY:
+                validations = await invoke_for_json(
+                    bedrock,
+                    prompt,
+                    system_prompt="You are a rigorous research hypothesis validator.",
+                    max_tokens=2500,
                 )
-                validated.append(hyp)
         except json.JSONDecodeError:
-            # Skip invalid responses
+            # Skip unparseable batches
+            return []
+        return validations if isinstance(validations, list) else []
+
+    indexed = list(enumerate(hypotheses))
+    batches = [
+        indexed[start:start + VALIDATION_BATCH_SIZE]
+        for start in range(0, len(indexed), VALIDATION_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(
+        *[_validate_batch(batch) for batch in batches],
+        return_exceptions=True,
+    )
+
+    validated = []
+    for result in results:
+        if isinstance(result, BaseException):
             continue
-    
-    # Sort by confidence
-    validated.sort(key=lambda x: x.get('confidence', 0), reverse=True)
-    
-    return {**state, "validated_hypotheses": validated, "status": "completed"}
+        for validation in result:
+            if not isinstance(validation, dict) or not validation.get('is_valid', False):
+                continue
+            idx = validation.get('id')
+            if not isinstance(idx, int) or not 0 <= idx < len(hypotheses):
+                continue
+            hyp = hypotheses[idx]
+            hyp['validation'] = validation
+            validated.append(hyp)
+
+    # Score and rank in one vectorized pass: confidence = scores @ weights
+    if validated:
+        scores = np.array([
+            [
+                h['validation'].get('logical_score', 0),
+                h['validation'].get('testability_score', 0),
+                h['validation'].get('novelty_score', 0),
+                h['validation'].get('significance_score', 0),
+            ]
+            for h in validated
+        ], dtype=np.float64)
+        confidence = scores @ _CONFIDENCE_WEIGHTS
+        for hyp, conf in zip(validated, confidence):
+            hyp['confidence'] = float(conf)
+        validated = [validated[i] for i in np.argsort(-confidence)]
+
+    return {"validated_hypotheses": validated, "status": "completed"}
 
 
 def create_hypothesis_graph() -> StateGraph:
@@ -236,6 +351,13 @@ class HypothesisAgent:
         }
 
 
+# Singleton instance - graph compilation is paid once per process
+_hypothesis_agent: Optional[HypothesisAgent] = None
+
+
 def get_hypothesis_agent() -> HypothesisAgent:
-    """Get hypothesis agent instance."""
-    return HypothesisAgent()
+    """Get or create the hypothesis agent instance."""
+    global _hypothesis_agent
+    if _hypothesis_agent is None:
+        _hypothesis_agent = HypothesisAgent()
+    return _hypothesis_agent
@@ -9,6 +9,8 @@ from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, BaseMessage
 from app.core.config import get_settings
+from app.core.http import get_async_client
+from app.core.tokens import truncate_to_tokens
 from app.agents.tools import (
     RESEARCH_TOOLS,
     VALIDATION_TOOLS,
@@ -17,15 +19,49 @@ from app.agents.tools import (
     check_hypothesis_novelty,
     score_hypothesis_testability,
 )
+import asyncio
+import functools
+import hashlib
 import logging
 import json
 from datetime import datetime
 import operator
+from pydantic import BaseModel, ValidationError
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+# Structured output schema for the analyzer
+class ConceptItem(BaseModel):
+    name: str
+    description: str = ""
+    paper_id: Optional[str] = None
+
+
+class ClaimItem(BaseModel):
+    text: str
+    type: str = "finding"
+    confidence: float = 0.5
+    paper_id: Optional[str] = None
+
+
+class AnalysisOutput(BaseModel):
+    concepts: List[ConceptItem] = []
+    claims: List[ClaimItem] = []
+
+
+# Structured output schema for the generator
+class HypothesisItem(BaseModel):
+    hypothesis: str
+    rationale: str = ""
+    expected_outcome: str = ""
+
+
+class GenerationOutput(BaseModel):
+    hypotheses: List[HypothesisItem] = []
+
+
 # State definition
 class AgenticHypothesisState(TypedDict):
     """State for the agentic hypothesis system."""
@@ -35,51 +71,96 @@ class AgenticHypothesisState(TypedDict):
     
     # Messages for agent communication
     messages: Annotated[List[BaseMessage], operator.add]
-    
-    # Extracted data
-    concepts: List[Dict[str, Any]]
-    claims: List[Dict[str, Any]]
-    
+
+    # Extracted data (reducers allow parallel branches to merge deterministically)
+    concepts: Annotated[List[Dict[str, Any]], operator.add]
+    claims: Annotated[List[Dict[str, Any]], operator.add]
+
     # Generated outputs
     hypotheses: List[Dict[str, Any]]
     research_gaps: List[Dict[str, Any]]
     citations: List[Dict[str, Any]]
-    
+
     # Tool outputs and agent decisions
-    tool_results: Dict[str, Any]
+    tool_results: Annotated[Dict[str, Any], operator.or_]
     next_agent: str
-    
+
     # Metadata
-    error: Optional[str]
+    error: Annotated[Optional[str], lambda a, b: b or a]
     status: str
     current_step: str
     progress: float
 
 
+@functools.lru_cache(maxsize=8)
 def create_llm(temperature: float = 0.7):
-    """Create LLM instance."""
+    """Create (or reuse) an LLM instance for the given temperature.
+
+    Memoized so the nodes share ChatOpenAI clients - and their pooled httpx
+    connections - instead of rebuilding one per invocation.
+    """
     return ChatOpenAI(
         model="gpt-4o-mini",
         temperature=temperature,
         api_key=settings.OPENAI_API_KEY,
+        http_async_client=get_async_client(),
     )
 
 
+# Compiled react agents, built once per process (tools are module constants)
+_REACT_AGENT_CACHE: Dict[str, Any] = {}
+
+# Serialized papers payloads, keyed by content hash so repeat runs over the
+# same papers skip the O(N) copy + dumps work
+_PAPERS_PAYLOAD_CACHE: Dict[str, str] = {}
+_PAPERS_PAYLOAD_CACHE_MAX = 32
+
+
+def _papers_payload(papers: List[Dict[str, Any]]) -> str:
+    """Serialize papers for the analyzer prompt, cached by content hash."""
+    key = hashlib.sha256("".join(
+        f"{p.get('id', '')}:{hashlib.sha256((p.get('content') or '').encode()).hexdigest()}"
+        for p in papers
+    ).encode()).hexdigest()
+
+    payload = _PAPERS_PAYLOAD_CACHE.get(key)
+    if payload is None:
+        # Compact separators: ~30% fewer bytes than indent=2 and a stable
+        # prefix for provider-side prompt caching
+        payload = json.dumps(
+            [{"title": p.get("title"), "content": truncate_to_tokens(p.get("content", ""), 250)} for p in papers],
+            separators=(",", ":"),
+        )
+        if len(_PAPERS_PAYLOAD_CACHE) >= _PAPERS_PAYLOAD_CACHE_MAX:
+            _PAPERS_PAYLOAD_CACHE.pop(next(iter(_PAPERS_PAYLOAD_CACHE)))
+        _PAPERS_PAYLOAD_CACHE[key] = payload
+    return payload
+
+
+def _get_react_agent(name: str, llm, tools):
+    """Get or build the named react agent."""
+    if name not in _REACT_AGENT_CACHE:
+        _REACT_AGENT_CACHE[name] = create_react_agent(llm, tools=tools)
+    return _REACT_AGENT_CACHE[name]
+
+
 # ============================================================================
 # AGENT NODES WITH TOOL USE
 # ============================================================================
 
-def research_agent_node(state: AgenticHypothesisState) -> AgenticHypothesisState:
+async def research_agent_node(state: AgenticHypothesisState) -> Dict[str, Any]:
     """
     Research Agent: Searches for related work and validates novelty.
     Uses: ArXiv, Semantic Scholar, novelty checker
+    Runs in parallel with the analyzer, so it returns only the keys it owns.
     """
     logger.info("🔬 Research Agent activated")
     
     llm = create_llm(temperature=0.3)
     
     # Create research agent with tools (system message included in task)
-    research_agent = create_react_agent(
+    research_agent = _get_react_agent(
+        "research",
         llm,
         tools=RESEARCH_TOOLS + NOVELTY_TOOLS
     )
@@ -100,7 +181,7 @@ Use your tools to gather evidence."""
     
     # Run research agent
     try:
-        result = research_agent.invoke({
+        result = await research_agent.ainvoke({
             "messages": [HumanMessage(content=task_message)]
         })
         
@@ -115,118 +196,126 @@ Use your tools to gather evidence."""
                     })
         
         # Store results
-        state["tool_results"]["research"] = {
-            "completed": True,
-            "tool_calls": len(tool_outputs),
-            "findings": result.get("messages", [])[-1].content if result.get("messages") else "No findings",
+        return {
+            "tool_results": {
+                "research": {
+                    "completed": True,
+                    "tool_calls": len(tool_outputs),
+                    "findings": result.get("messages", [])[-1].content if result.get("messages") else "No findings",
+                }
+            },
+            "messages": [AIMessage(
+                content=f"Research Agent completed. Found {len(tool_outputs)} relevant sources.",
+                name="research_agent"
+            )],
         }
-        
-        state["messages"].append(AIMessage(
-            content=f"Research Agent completed. Found {len(tool_outputs)} relevant sources.",
-            name="research_agent"
-        ))
-        
-        state["progress"] = 0.3
-        state["current_step"] = "research_complete"
-        
+
     except Exception as e:
         logger.error(f"Research agent error: {e}")
-        state["error"] = f"Research failed: {str(e)}"
-    
-    return state
+        return {"error": f"Research failed: {str(e)}"}
 
 
-def analyzer_agent_node(state: AgenticHypothesisState) -> AgenticHypothesisState:
+async def analyzer_agent_node(state: AgenticHypothesisState) -> Dict[str, Any]:
     """
     Analyzer Agent: Deep analysis of papers and concept extraction.
     No external tools - focuses on internal analysis.
+    Runs in parallel with the research agent, so it returns only the keys it owns.
     """
     logger.info("🧠 Analyzer Agent activated")
-    
+
     llm = create_llm(temperature=0.5)
-    
+
     papers = state.get("papers", [])
     if not papers:
-        state["error"] = "No papers to analyze"
-        return state
+        return {"error": "No papers to analyze"}
     
-    # Analyze papers
-    analysis_prompt = f"""Analyze these {len(papers)} academic papers and extract:
+    # Static instructions lead the prompt so provider prompt caching can
+    # reuse the shared prefix; the variable papers payload comes last
+    analysis_prompt = f"""Analyze the academic papers below and extract:
 1. Core concepts and theories (5-10 per paper)
 2. Key claims and findings (3-5 per paper)
 3. Methodologies used
 
-Papers:
-{json.dumps([{"title": p.get("title"), "content": p.get("content", "")[:1000]} for p in papers], indent=2)}
-
 Return structured JSON with:
 - concepts: [{{name, description, paper_id}}]
 - claims: [{{text, type, confidence, paper_id}}]
+
+Papers ({len(papers)} total):
+{_papers_payload(papers)}
 """
     
     try:
-        response = llm.invoke([
+        structured = llm.with_structured_output(AnalysisOutput)
+        messages = [
             SystemMessage(content="You are an expert research analyzer. Extract structured insights from papers."),
             HumanMessage(content=analysis_prompt)
-        ])
-        
-        # Parse response (simplified - in production use structured output)
-        content = response.content
-        
-        # Extract concepts and claims (simplified parsing)
-        # In production, use JSON mode or structured outputs
-        state["concepts"] = [
-            {"id": f"concept_{i}", "name": f"Concept {i+1}", "source_papers": [papers[0].get("id")]}
-            for i in range(min(5, len(papers) * 3))
         ]
-        
-        state["claims"] = [
+
+        # Retry with the validation error fed back so the model can self-correct
+        result = None
+        for attempt in range(3):
+            try:
+                result = await structured.ainvoke(messages)
+                break
+            except (ValidationError, ValueError) as exc:
+                if attempt == 2:
+                    raise
+                await asyncio.sleep(1.0 * (attempt + 1))
+                messages = messages + [HumanMessage(
+                    content=f"Your previous output failed validation: {exc}. "
+                            f"Return data matching the requested schema exactly."
+                )]
+
+        concepts = [
+            {
+                "id": f"concept_{i}",
+                "name": c.name,
+                "description": c.description,
+                "source_papers": [c.paper_id] if c.paper_id else [],
+            }
+            for i, c in enumerate(result.concepts)
+        ]
+
+        claims = [
             {
                 "id": f"claim_{i}",
-                "text": f"Claim from analysis {i+1}",
-                "type": "finding",
-                "confidence": 0.8,
-                "source_paper_id": papers[0].get("id"),
+                "text": c.text,
+                "type": c.type,
+                "confidence": c.confidence,
+                "source_paper_id": c.paper_id,
             }
-            for i in range(min(3, len(papers) * 2))
+            for i, c in enumerate(result.claims)
         ]
-        
-        state["messages"].append(AIMessage(
-            content=f"Analyzer extracted {len(state['concepts'])} concepts and {len(state['claims'])} claims.",
-            name="analyzer_agent"
-        ))
-        
-        state["progress"] = 0.5
-        state["current_step"] = "analysis_complete"
-        
+
+        return {
+            "concepts": concepts,
+            "claims": claims,
+            "messages": [AIMessage(
+                content=f"Analyzer extracted {len(concepts)} concepts and {len(claims)} claims.",
+                name="analyzer_agent"
+            )],
+        }
+
     except Exception as e:
         logger.error(f"Analyzer error: {e}")
-        state["error"] = f"Analysis failed: {str(e)}"
-    
-    return state
+        return {"error": f"Analysis failed: {str(e)}"}
 
 
-def hypothesis_generator_node(state: AgenticHypothesisState) -> AgenticHypothesisState:
+async def hypothesis_generator_node(state: AgenticHypothesisState) -> Dict[str, Any]:
     """
     Hypothesis Generator: Creates novel hypotheses from concepts.
-    Uses validation tools to check testability.
+    Uses structured output so no free-form parsing is needed.
     """
-    logger.info("💡 Hypothesis Generator activated")
-    
+    logger.info("\U0001f4a1 Hypothesis Generator activated")
+
     llm = create_llm(temperature=0.8)
-    
-    # Create generator with validation tools
-    generator = create_react_agent(
-        llm,
-        tools=[score_hypothesis_testability]
-    )
-    
+
     concepts = state.get("concepts", [])
     claims = state.get("claims", [])
     focus = state.get("focus_area", "")
-    
+
     concept_names = [c.get("name") for c in concepts[:10]]
-    
+
     gen_prompt = f"""Generate Research Hypotheses based on these concepts:
 
 Concepts: {', '.join(concept_names)}
@@ -238,148 +327,56 @@ Generate 3-5 novel, testable research hypotheses. For each hypothesis, provide:
 2. **Rationale**: Why this hypothesis is interesting and novel
 3. **Expected Outcome**: What would validate this hypothesis
 
-Format each hypothesis as:
-HYPOTHESIS X: [Your hypothesis statement]
-RATIONALE: [Why this is novel and interesting]
-EXPECTED OUTCOME: [What would prove/disprove this]
-
 Generate creative hypotheses that combine concepts in unexpected ways!"""
-    
+
     try:
-        result = generator.invoke({
-            "messages": [HumanMessage(content=gen_prompt)]
-        })
-        
-        # Extract the actual LLM response
+        structured = llm.with_structured_output(GenerationOutput)
+        result = await structured.ainvoke([
+            SystemMessage(content="You are a creative research hypothesis generator. Return 3-5 novel, testable hypotheses."),
+            HumanMessage(content=gen_prompt)
+        ])
+
         hypotheses = []
-        if result and "messages" in result:
-            last_message = result["messages"][-1]
-            response_text = last_message.content if hasattr(last_message, 'content') else str(last_message)
-            
-            # Log the response for debugging
-            logger.info(f"📝 LLM Response Length: {len(response_text)} chars")
-            logger.info(f"📝 First 500 chars: {response_text[:500]}")
-            
-            # Parse hypotheses using pattern matching
-            # Look for "HYPOTHESIS X:" pattern
-            import re
-            hyp_pattern = r'HYPOTHESIS\s+(\d+):\s*(.+?)(?=RATIONALE:|$)'
-            rat_pattern = r'RATIONALE:\s*(.+?)(?=EXPECTED|HYPOTHESIS|$)'
-            out_pattern = r'EXPECTED\s+OUTCOME:\s*(.+?)(?=HYPOTHESIS|$)'
-            
-            hyp_matches = re.findall(hyp_pattern, response_text, re.DOTALL | re.IGNORECASE)
-            
-            for idx, (num, hyp_text) in enumerate(hyp_matches):
-                hyp_text = hyp_text.strip()
-                
-                # Find corresponding rationale
-                # Search after this hypothesis
-                start_pos = response_text.find(f"HYPOTHESIS {num}")
-                section = response_text[start_pos:start_pos+2000]
-                
-                rat_match = re.search(rat_pattern, section, re.DOTALL | re.IGNORECASE)
-                rationale = rat_match.group(1).strip() if rat_match else "Generated from concept analysis"
-                
-                out_match = re.search(out_pattern, section, re.DOTALL | re.IGNORECASE)
-                outcome = out_match.group(1).strip() if out_match else ""
-                
-                hypotheses.append({
-                    "id": f"hyp_{idx+1}",
-                    "hypothesis": hyp_text[:500],  # Match test expectation
-                    "title": hyp_text[:200],
-                    "description": hyp_text[:500],
-                    "rationale": rationale[:500],
-                    "expected_outcome": outcome[:300] if outcome else "",
-                    "source_concepts": [c.get("id") for c in concepts[:3]] if concepts else [],
-                    "methodology_hints": ["Experimental validation", "Statistical analysis"],
-                    "testability_score": 7.5,
-                    "novelty_score": 8.0,
-                    "significance_score": 7.0,
-                    "confidence": 7.5,
-                    "confidence_score": 7.5,  # Match test expectation
-                    "status": "generated",
-                    "supporting_claims": [claims[0].get("id")] if claims else [],
-                })
-            
-            # If no pattern matches, try simpler line-based parsing
-            if not hypotheses:
-                logger.warning("⚠️  No HYPOTHESIS pattern found, trying line-based parsing")
-                lines = response_text.split('\n')
-                hyp_counter = 0
-                current_text = []
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Check if it's a hypothesis line (starts with number or bullet)
-                    if re.match(r'^[\d\-\*\•]', line):
-                        if current_text:
-                            hyp_counter += 1
-                            full_text = ' '.join(current_text)
-                            hypotheses.append({
-                                "id": f"hyp_{hyp_counter}",
-                                "hypothesis": full_text[:500],
-                                "title": full_text[:200],
-                                "description": full_text[:500],
-                                "rationale": "Generated from concept analysis",
-                                "source_concepts": [c.get("id") for c in concepts[:3]] if concepts else [],
-                                "methodology_hints": ["Experimental validation"],
-                                "testability_score": 7.5,
-                                "novelty_score": 8.0,
-                                "confidence_score": 7.5,
-                                "status": "generated",
-                                "supporting_claims": [],
-                            })
-                            current_text = []
-                        # Remove number/bullet and add line
-                        clean_line = re.sub(r'^[\d\-\*\•\)\.\s]+', '', line)
-                        if clean_line:
-                            current_text.append(clean_line)
-                    else:
-                        current_text.append(line)
-                
-                # Add last one
-                if current_text:
-                    hyp_counter += 1
-                    full_text = ' '.join(current_text)
-                    hypotheses.append({
-                        "id": f"hyp_{hyp_counter}",
-                        "hypothesis": full_text[:500],
-                        "title": full_text[:200],
-                        "description": full_text[:500],
-                        "rationale": "Generated from concept analysis",
-                        "source_concepts": [c.get("id") for c in concepts[:3]] if concepts else [],
-                        "testability_score": 7.5,
-                        "novelty_score": 8.0,
-                        "confidence_score": 7.5,
-                        "status": "generated",
-                        "supporting_claims": [],
-                    })
-            
-            logger.info(f"✅ Parsed {len(hypotheses)} hypotheses from LLM response")
-            state["hypotheses"] = hypotheses
-        else:
-            logger.error("❌ No valid result from generator")
-            state["hypotheses"] = []
-        
-        state["messages"].append(AIMessage(
-            content=f"Generated {len(state['hypotheses'])} hypotheses with LLM analysis.",
-            name="generator_agent"
-        ))
-        
-        state["progress"] = 0.7
-        state["current_step"] = "hypotheses_generated"
-        
+        for idx, item in enumerate(result.hypotheses):
+            hyp_text = item.hypothesis.strip()
+            rationale = item.rationale.strip() or "Generated from concept analysis"
+            outcome = item.expected_outcome.strip()
+            hypotheses.append({
+                "id": f"hyp_{idx+1}",
+                "hypothesis": hyp_text[:500],  # Match test expectation
+                "title": hyp_text[:200],
+                "description": hyp_text[:500],
+                "rationale": rationale[:500],
+                "expected_outcome": outcome[:300] if outcome else "",
+                "source_concepts": [c.get("id") for c in concepts[:3]] if concepts else [],
+                "methodology_hints": ["Experimental validation", "Statistical analysis"],
+                "testability_score": 7.5,
+                "novelty_score": 8.0,
+                "significance_score": 7.0,
+                "confidence": 7.5,
+                "confidence_score": 7.5,  # Match test expectation
+                "status": "generated",
+                "supporting_claims": [claims[0].get("id")] if claims else [],
+            })
+
+        logger.info(f"\u2705 Generated {len(hypotheses)} structured hypotheses")
+
+        return {
+            "hypotheses": hypotheses,
+            "messages": [AIMessage(
+                content=f"Generated {len(hypotheses)} hypotheses with LLM analysis.",
+                name="generator_agent"
+            )],
+            "progress": 0.7,
+            "current_step": "hypotheses_generated",
+        }
+
     except Exception as e:
         logger.error(f"Generator error: {e}")
-        state["error"] = f"Generation failed: {str(e)}"
-    
-    return state
+        return {"error": f"Generation failed: {str(e)}"}
 
 
-def critic_agent_node(state: AgenticHypothesisState) -> AgenticHypothesisState:
+async def critic_agent_node(state: AgenticHypothesisState) -> Dict[str, Any]:
     """
     Critic Agent: Evaluates and scores hypotheses.
     Uses validation tools and novelty checker.
@@ -389,16 +386,16 @@ def critic_agent_node(state: AgenticHypothesisState) -> AgenticHypothesisState:
     llm = create_llm(temperature=0.3)
     
     # Create critic with full validation toolkit
-    critic = create_react_agent(
+    critic = _get_react_agent(
+        "critic",
         llm,
         tools=VALIDATION_TOOLS + [check_hypothesis_novelty]
     )
     
     hypotheses = state.get("hypotheses", [])
-    
+
     if not hypotheses:
-        state["next_agent"] = "END"
-        return state
+        return {"next_agent": "END"}
     
     critic_prompt = f"""Evaluate these {len(hypotheses)} hypotheses:
 
@@ -410,29 +407,41 @@ For each:
 3. Provide a final score (0-1) and feedback"""
     
     try:
-        result = critic.invoke({
+        result = await critic.ainvoke({
             "messages": [HumanMessage(content=critic_prompt)]
         })
         
         # Update hypothesis scores based on critique
-        for hyp in state["hypotheses"]:
+        for hyp in hypotheses:
             hyp["validation_feedback"] = "Validated by critic agent"
             hyp["status"] = "validated"
-        
-        state["messages"].append(AIMessage(
-            content=f"Critic validated all {len(hypotheses)} hypotheses.",
-            name="critic_agent"
-        ))
-        
-        state["progress"] = 0.9
-        state["current_step"] = "validation_complete"
-        state["next_agent"] = "END"
-        
+
+        return {
+            "hypotheses": hypotheses,
+            "messages": [AIMessage(
+                content=f"Critic validated all {len(hypotheses)} hypotheses.",
+                name="critic_agent"
+            )],
+            "progress": 0.9,
+            "current_step": "validation_complete",
+            "next_agent": "END",
+        }
+
     except Exception as e:
         logger.error(f"Critic error: {e}")
-        state["error"] = f"Validation failed: {str(e)}"
-    
-    return state
+        return {"error": f"Validation failed: {str(e)}"}
+
+
+def join_node(state: AgenticHypothesisState) -> Dict[str, Any]:
+    """
+    Join point for the parallel research/analyze branches.
+    Both branches have merged into state by the time this runs.
+    """
+    logger.info("🔀 Research and analysis branches joined")
+    return {
+        "progress": 0.5,
+        "current_step": "analysis_complete",
+    }
 
 
 # ============================================================================
@@ -444,21 +453,19 @@ def supervisor_router(state: AgenticHypothesisState) -> str:
     Supervisor: Routes to next agent based on current state.
     """
     current = state.get("current_step", "start")
-    
+
     if state.get("error"):
         return "END"
-    
+
     routing = {
-        "start": "research",
-        "research_complete": "analyze",
         "analysis_complete": "generate",
         "hypotheses_generated": "critique",
         "validation_complete": "END",
     }
-    
+
     next_step = routing.get(current, "END")
     logger.info(f"📋 Supervisor routing: {current} → {next_step}")
-    
+
     return next_step
 
 
@@ -474,27 +481,24 @@ def build_agentic_workflow() -> StateGraph:
     # Add agent nodes
     workflow.add_node("research", research_agent_node)
     workflow.add_node("analyze", analyzer_agent_node)
+    workflow.add_node("join", join_node)
     workflow.add_node("generate", hypothesis_generator_node)
     workflow.add_node("critique", critic_agent_node)
-    
-    # Add conditional routing
-    workflow.add_conditional_edges(
-        START,
-        lambda s: "research",  # Always start with research
-    )
-    
-    workflow.add_conditional_edges(
-        "research",
-        supervisor_router,
-        {"analyze": "analyze", "END": END}
-    )
-    
+
+    # Research (external search) and analysis (internal parsing) are
+    # independent, so fan them out in parallel from START and join before
+    # generation. Latency drops from sum-of-branches to max-of-branches.
+    workflow.add_edge(START, "research")
+    workflow.add_edge(START, "analyze")
+    workflow.add_edge("research", "join")
+    workflow.add_edge("analyze", "join")
+
     workflow.add_conditional_edges(
-        "analyze",
+        "join",
         supervisor_router,
         {"generate": "generate", "END": END}
     )
-    
+
     workflow.add_conditional_edges(
         "generate",
         supervisor_router,
@@ -559,7 +563,7 @@ async def generate_hypotheses_agentic(
         }
         
         # Run workflow
-        final_state = workflow.invoke(initial_state)
+        final_state = await workflow.ainvoke(initial_state)
         
         # Extract results
         return {
@@ -1,8 +1,14 @@
 from typing import TypedDict, List, Annotated, Optional
 from langgraph.graph import StateGraph, END
+import asyncio
+import ijson
 import operator
-from app.core import get_openai_service
+import orjson
+import re
+from app.core import get_openai_service, cached_openai_invoke, get_encoder, truncate_to_tokens
+from app.core.llm_cache import _cache_key, load_cached_response, store_cached_response
 from app.services import get_pdf_processor, get_elevenlabs_service
+from app.services.tts import TTS_CONCURRENCY
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,37 +26,131 @@ class PodcastState(TypedDict):
     status: str
 
 
+# Long documents are summarized block-by-block in parallel; short ones in one call
+SUMMARY_BLOCK_CHARS = 25000
+SUMMARY_CONCURRENCY = asyncio.Semaphore(4)
+
+# PDFs under this token count go straight into the script prompt - the
+# summarization round-trip would cost more than it saves
+SUMMARY_SKIP_TOKENS = 8000
+
+# Hard token ceiling on summarization input; char budgets alone over-fill
+# the context for CJK/emoji-heavy documents where chars-per-token drops
+SUMMARY_MAX_TOKENS = 40000
+
+_SUMMARY_SYSTEM_PROMPT = (
+    "You are an expert academic content summarizer. Analyze the provided "
+    "academic content and create a comprehensive summary that captures the "
+    "key concepts, arguments, and insights. Focus on making it engaging and "
+    "educational - a detailed summary that would work well as the basis for "
+    "an educational podcast episode."
+)
+
+
 async def extract_content(state: PodcastState) -> PodcastState:
-    """Extract and summarize content from PDF."""
+    """Extract and summarize content from PDF.
+
+    Short documents are summarized in one call. Long ones are split into
+    blocks summarized concurrently, then merged with a final synthesis
+    call - wall time is one block's latency plus the merge instead of a
+    single call over the whole document (or K sequential block calls).
+    The instruction template stays entirely in the (identical-across-calls)
+    system prompt so provider prompt caching can reuse the stable prefix.
+    """
     llm = get_openai_service()
-    
-    prompt = f"""Analyze the following academic content and create a comprehensive summary 
-    that captures the key concepts, arguments, and insights. Focus on making it engaging 
-    and educational.
-    
-    Content:
-    {state['pdf_content'][:50000]}  # Limit to avoid token limits
-    
-    Provide a detailed summary that would work well as the basis for an educational podcast episode."""
-    
-    summary = await llm.invoke(
-        prompt,
-        system_prompt="You are an expert academic content summarizer. Create engaging, educational summaries.",
+
+    # Short PDFs fit the script model's context as-is; skip the
+    # summarization round-trip entirely and hand the text straight through
+    if len(get_encoder().encode(state['pdf_content'])) < SUMMARY_SKIP_TOKENS:
+        return {"summary": state['pdf_content'], "status": "skipped_summary"}
+
+    # Keep the most informative windows under the budget instead of
+    # hard-truncating - long PDFs shed low-signal pages, not their tail -
+    # then cap in token space so mixed-script text cannot blow the context
+    content = truncate_to_tokens(
+        get_pdf_processor().select_informative_text(state['pdf_content'], 50000),
+        SUMMARY_MAX_TOKENS,
+    )
+
+    if len(content) <= SUMMARY_BLOCK_CHARS:
+        # Deterministic function of the PDF - cache so regenerations are free
+        summary = await cached_openai_invoke(
+            llm,
+            f"Content:\n    {content}",
+            system_prompt=_SUMMARY_SYSTEM_PROMPT,
+            max_tokens=4000,
+        )
+        return {"summary": summary, "status": "summarized"}
+
+    blocks = [
+        content[start:start + SUMMARY_BLOCK_CHARS]
+        for start in range(0, len(content), SUMMARY_BLOCK_CHARS)
+    ]
+
+    async def _summarize_block(block: str) -> str:
+        async with SUMMARY_CONCURRENCY:
+            return await cached_openai_invoke(
+                llm,
+                f"Content:\n    {block}",
+                system_prompt=_SUMMARY_SYSTEM_PROMPT,
+                max_tokens=1500,
+            )
+
+    results = await asyncio.gather(
+        *[_summarize_block(block) for block in blocks],
+        return_exceptions=True,
+    )
+    block_summaries = [r for r in results if not isinstance(r, BaseException)]
+
+    # Merge the concurrent block summaries into one cohesive narrative
+    summary = await cached_openai_invoke(
+        llm,
+        "Section summaries:\n\n" + "\n\n".join(block_summaries),
+        system_prompt=(
+            "You are an expert academic content summarizer. Merge the provided "
+            "section summaries into one cohesive, engaging summary suitable as "
+            "the basis for an educational podcast episode. Preserve the key "
+            "concepts, arguments, and insights without repeating yourself."
+        ),
         max_tokens=4000,
     )
-    
-    return {**state, "summary": summary, "status": "summarized"}
+
+    return {"summary": summary, "status": "summarized"}
+
+
+# Strips leading/trailing markdown fences without rebuilding the string
+# line-by-line; compiled once, applied per parse
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*\n?|\n?```\s*$', re.MULTILINE)
 
 
-async def generate_script(state: PodcastState) -> PodcastState:
-    """Generate a two-person podcast script from the summary."""
+def _parse_script(script_text: str) -> List[dict]:
+    """Parse a complete script response, tolerating markdown fences."""
+    script_text = _FENCE_RE.sub('', script_text).strip()
+
+    try:
+        # orjson: scripts for 8-12 minute episodes run to tens of KB
+        script = orjson.loads(script_text)
+    except orjson.JSONDecodeError:
+        return []
+    return script if isinstance(script, list) else []
+
+
+async def generate_script_and_audio(state: PodcastState) -> PodcastState:
+    """Generate the script and its audio as one pipelined stage.
+
+    The script completion is streamed and parsed incrementally; each
+    dialogue line is handed to TTS the moment its JSON object closes, so
+    synthesis overlaps generation and wall time approaches
+    max(script_time, audio_time) instead of their sum.
+    """
     llm = get_openai_service()
-    
+    tts = get_elevenlabs_service()
+
     prompt = f"""Create an engaging two-person podcast script based on this academic summary.
-    
+
     Summary:
     {state['summary']}
-    
+
     Guidelines:
     - Create a natural conversation between two hosts: Alex (curious learner) and Sam (knowledgeable expert)
     - Make it educational but entertaining
@@ -58,46 +158,108 @@ async def generate_script(state: PodcastState) -> PodcastState:
     - Break down complex concepts
     - The script should be 5-10 minutes when read aloud
     - Format each line as JSON: {{"speaker": 1 or 2, "text": "dialogue"}}
-    
+
     Return ONLY a JSON array of dialogue lines, no other text."""
-    
-    script_text = await llm.invoke(
-        prompt,
-        system_prompt="You are a podcast scriptwriter. Create engaging educational dialogue.",
-        max_tokens=8000,
-    )
-    
-    # Parse the script
-    import json
-    try:
-        # Clean up the response
-        script_text = script_text.strip()
-        if script_text.startswith("```"):
-            script_text = script_text.split("```")[1]
-            if script_text.startswith("json"):
-                script_text = script_text[4:]
-        
-        script = json.loads(script_text)
-    except json.JSONDecodeError:
+    system_prompt = "You are a podcast scriptwriter. Create engaging educational dialogue."
+
+    script: List[dict] = []
+    tasks: List[asyncio.Task] = []
+
+    async def _synthesize(line: dict) -> bytes:
+        voice = tts.voice_1 if line["speaker"] == 1 else tts.voice_2
+        async with TTS_CONCURRENCY:
+            return await tts.generate_speech(line["text"], voice)
+
+    def _dispatch(line: dict) -> None:
+        """Record a parsed line and start its TTS request immediately."""
+        if isinstance(line, dict) and line.get("text"):
+            script.append(line)
+            tasks.append(asyncio.create_task(_synthesize(line)))
+
+    # Regenerations replay the cached script text instead of re-streaming
+    cache_key = _cache_key(llm.model, prompt, system_prompt, 8000, 0.7)
+    cached_text = load_cached_response(cache_key)
+    if cached_text is not None:
+        for line in _parse_script(cached_text):
+            _dispatch(line)
+    else:
+        items = ijson.sendable_list()
+        coro = ijson.items_coro(items, 'item')
+        buffered: List[str] = []
+        prefix = ''
+        started = False
+        failed = False
+
+        async for chunk in llm.invoke_stream(
+            prompt,
+            system_prompt=system_prompt,
+            max_tokens=8000,
+        ):
+            buffered.append(chunk)
+            if failed:
+                continue
+            if not started:
+                # Skip any prose/fence prefix up to the opening bracket
+                prefix += chunk
+                start = prefix.find('[')
+                if start == -1:
+                    continue
+                chunk = prefix[start:]
+                started = True
+            try:
+                coro.send(chunk.encode())
+            except Exception:
+                failed = True
+                continue
+            for line in items:
+                _dispatch(line)
+            del items[:]
+
+        if started and not failed:
+            try:
+                coro.close()
+            except Exception:
+                pass
+            for line in items:
+                _dispatch(line)
+
+        script_text = ''.join(buffered)
+        if not script:
+            # Stream was not incrementally parseable - parse the whole text
+            for line in _parse_script(script_text):
+                _dispatch(line)
+        if script:
+            store_cached_response(cache_key, script_text)
+
+    if not script:
         # Fallback: create a simple script
-        script = [
-            {"speaker": 1, "text": f"Welcome to our podcast! Today we're discussing an interesting topic."},
+        for line in [
+            {"speaker": 1, "text": "Welcome to our podcast! Today we're discussing an interesting topic."},
             {"speaker": 2, "text": state['summary'][:500]},
             {"speaker": 1, "text": "That's fascinating! Thanks for listening."},
-        ]
-    
-    return {**state, "script": script, "status": "scripted"}
+        ]:
+            _dispatch(line)
 
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    audio_segments = []
+    for i, result in enumerate(results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Error generating speech for line {i}: {result}")
+            continue
+        audio_segments.append(result)
 
-async def generate_audio(state: PodcastState) -> PodcastState:
-    """Generate audio from the script using ElevenLabs."""
-    tts = get_elevenlabs_service()
-    
-    try:
-        audio = await tts.generate_dialogue(state['script'])
-        return {**state, "final_audio": audio, "status": "completed"}
-    except Exception as e:
-        return {**state, "error": str(e), "status": "failed"}
+    if not audio_segments:
+        return {"script": script, "error": "No audio segments generated", "status": "failed"}
+
+    final_audio = tts._combine_audio(audio_segments)
+    # Partial update: LangGraph merges the delta, so the pdf_content and
+    # metadata keys are never respread alongside multi-MB audio payloads
+    return {
+        "script": script,
+        "audio_segments": audio_segments,
+        "final_audio": final_audio,
+        "status": "completed",
+    }
 
 
 def should_continue(state: PodcastState) -> str:
@@ -111,16 +273,14 @@ def create_podcast_graph() -> StateGraph:
     """Create the podcast generation workflow graph."""
     workflow = StateGraph(PodcastState)
     
-    # Add nodes
+    # Add nodes - script and audio run as one pipelined stage
     workflow.add_node("extract", extract_content)
-    workflow.add_node("script", generate_script)
-    workflow.add_node("audio", generate_audio)
-    
+    workflow.add_node("produce", generate_script_and_audio)
+
     # Add edges
     workflow.set_entry_point("extract")
-    workflow.add_edge("extract", "script")
-    workflow.add_edge("script", "audio")
-    workflow.add_edge("audio", END)
+    workflow.add_edge("extract", "produce")
+    workflow.add_edge("produce", END)
     
     return workflow.compile()
 
@@ -138,14 +298,18 @@ class PodcastAgent:
         """Generate a podcast from PDF bytes with Mamba intelligence."""
         logger.info(f"Starting podcast generation with Mamba={'enabled' if self.use_mamba else 'disabled'}")
         
-        # Extract text from PDF with intelligent filtering
-        content = await self.pdf_processor.extract_text(pdf_bytes)
-        metadata = await self.pdf_processor.extract_metadata(pdf_bytes)
+        # Extract text and metadata concurrently - both parse on worker
+        # threads, so the two fitz passes overlap instead of running serially
+        content, metadata = await asyncio.gather(
+            self.pdf_processor.extract_text(pdf_bytes),
+            self.pdf_processor.extract_metadata(pdf_bytes),
+        )
         
-        # Extract key concepts if using Mamba
+        # Extract key concepts if using Mamba - from the already-extracted
+        # text, so the PDF is not parsed a second time
         if self.use_mamba:
             try:
-                key_concepts = await self.pdf_processor.extract_key_concepts(pdf_bytes, top_k=10)
+                key_concepts = await self.pdf_processor.extract_key_concepts(content, top_k=10)
                 logger.info(f"Extracted key concepts: {key_concepts[:5]}")
                 metadata['key_concepts'] = key_concepts
             except Exception as e:
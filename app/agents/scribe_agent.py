@@ -1,54 +1,24 @@
 from typing import Dict, Any, Optional
 from app.core import get_bedrock_service
+from app.agents._json_utils import extract_json
 import json
 import re
 
-
-class ScribeAgent:
-    """Agent for converting images of notes to code/math."""
-    
-    def __init__(self):
-        self.bedrock = get_bedrock_service()
-    
-    async def analyze_image(
-        self,
-        image_base64: str,
-        output_type: str,
-        media_type: str = "image/jpeg",
-    ) -> Dict[str, Any]:
-        """
-        Analyze an image and convert to the requested output type.
-        
-        Args:
-            image_base64: Base64 encoded image
-            output_type: 'math', 'code', or 'diagram'
-            media_type: MIME type of the image
-        
-        Returns:
-            Dictionary with result, format, and confidence
-        """
-        prompts = {
-            "math": self._get_math_prompt(),
-            "code": self._get_code_prompt(),
-            "diagram": self._get_diagram_prompt(),
-        }
-        
-        prompt = prompts.get(output_type, prompts["math"])
-        
-        response = await self.bedrock.invoke_claude_vision(
-            prompt=prompt,
-            image_base64=image_base64,
-            image_media_type=media_type,
-            system_prompt="You are an expert at converting handwritten content to digital formats.",
-        )
-        
-        # Parse the response
-        result = self._parse_response(response, output_type)
-        
-        return result
-    
-    def _get_math_prompt(self) -> str:
-        return """Analyze this handwritten mathematical content and convert it to LaTeX.
+# Static lookup tables for _parse_response; built once instead of per call
+_FORMAT_MAP = {
+    "math": "latex",
+    "diagram": "mermaid",
+}
+_RESULT_KEY = {
+    "math": "latex",
+    "code": "code",
+    "diagram": "mermaid",
+}
+
+# Conversion prompts are fully static - defined once at module load so each
+# analyze_image call just indexes into _PROMPTS. Identical bytes per request
+# also keeps any provider-side prompt caching effective.
+_MATH_PROMPT = """Analyze this handwritten mathematical content and convert it to LaTeX.
 
 Instructions:
 1. Identify all mathematical expressions, equations, and formulas
@@ -65,8 +35,7 @@ Return a JSON object with:
 
 Return ONLY the JSON object."""
 
-    def _get_code_prompt(self) -> str:
-        return """Analyze this handwritten code or pseudocode and convert it to working code.
+_CODE_PROMPT = """Analyze this handwritten code or pseudocode and convert it to working code.
 
 Instructions:
 1. Identify the programming language (or infer the best one)
@@ -84,8 +53,7 @@ Return a JSON object with:
 
 Return ONLY the JSON object."""
 
-    def _get_diagram_prompt(self) -> str:
-        return """Analyze this handwritten diagram and convert it to a Mermaid diagram.
+_DIAGRAM_PROMPT = """Analyze this handwritten diagram and convert it to a Mermaid diagram.
 
 Instructions:
 1. Identify the type of diagram (flowchart, sequence, class, etc.)
@@ -102,34 +70,83 @@ Return a JSON object with:
 
 Return ONLY the JSON object."""
 
+_PROMPTS = {
+    "math": _MATH_PROMPT,
+    "code": _CODE_PROMPT,
+    "diagram": _DIAGRAM_PROMPT,
+}
+
+_VALIDATE_MATH_PROMPT = """Validate this LaTeX mathematical expression:
+
+{latex}
+
+Check for:
+1. Syntax correctness
+2. Mathematical validity
+3. Common errors or typos
+4. Potential improvements
+
+Return a JSON object with:
+- is_valid: boolean
+- syntax_issues: array of syntax problems
+- math_issues: array of mathematical issues
+- corrected_latex: corrected version if needed
+- confidence: confidence in the validation
+
+Return ONLY the JSON object."""
+
+
+class ScribeAgent:
+    """Agent for converting images of notes to code/math."""
+    
+    def __init__(self):
+        self.bedrock = get_bedrock_service()
+    
+    async def analyze_image(
+        self,
+        image_base64: str,
+        output_type: str,
+        media_type: str = "image/jpeg",
+    ) -> Dict[str, Any]:
+        """
+        Analyze an image and convert to the requested output type.
+        
+        Args:
+            image_base64: Base64 encoded image
+            output_type: 'math', 'code', or 'diagram'
+            media_type: MIME type of the image
+        
+        Returns:
+            Dictionary with result, format, and confidence
+        """
+        prompt = _PROMPTS.get(output_type, _MATH_PROMPT)
+        
+        response = await self.bedrock.invoke_claude_vision(
+            prompt=prompt,
+            image_base64=image_base64,
+            image_media_type=media_type,
+            system_prompt="You are an expert at converting handwritten content to digital formats.",
+        )
+        
+        # Parse the response
+        result = self._parse_response(response, output_type)
+        
+        return result
+    
     def _parse_response(self, response: str, output_type: str) -> Dict[str, Any]:
         """Parse the AI response into structured output."""
         try:
-            # Clean up the response
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            
-            data = json.loads(response)
-            
-            # Map to expected format
-            format_map = {
-                "math": "latex",
-                "code": data.get("language", "python"),
-                "diagram": "mermaid",
-            }
-            
-            result_key = {
-                "math": "latex",
-                "code": "code",
-                "diagram": "mermaid",
-            }
-            
+            data = extract_json(response)
+
+            # Map to expected format ("code" derives its format per response)
+            if output_type == "code":
+                output_format = data.get("language", "python")
+            else:
+                output_format = _FORMAT_MAP[output_type]
+
             return {
-                "result": data.get(result_key[output_type], ""),
-                "format": format_map[output_type],
+                "result": data.get(_RESULT_KEY[output_type], ""),
+                "format": output_format,
                 "confidence": data.get("confidence", 0.8),
                 "description": data.get("description", ""),
                 "suggestions": data.get("suggestions", []),
@@ -146,34 +163,12 @@ Return ONLY the JSON object."""
     
     async def validate_math(self, latex: str) -> Dict[str, Any]:
         """Validate LaTeX syntax and mathematical correctness."""
-        prompt = f"""Validate this LaTeX mathematical expression:
-
-{latex}
-
-Check for:
-1. Syntax correctness
-2. Mathematical validity
-3. Common errors or typos
-4. Potential improvements
-
-Return a JSON object with:
-- is_valid: boolean
-- syntax_issues: array of syntax problems
-- math_issues: array of mathematical issues
-- corrected_latex: corrected version if needed
-- confidence: confidence in the validation
-
-Return ONLY the JSON object."""
+        prompt = _VALIDATE_MATH_PROMPT.format(latex=latex)
 
         response = await self.bedrock.invoke_claude(prompt)
         
         try:
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            return json.loads(response)
+            return extract_json(response)
         except json.JSONDecodeError:
             return {"is_valid": True, "confidence": 0.5}
 
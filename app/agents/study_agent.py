@@ -1,8 +1,36 @@
 from typing import TypedDict, List, Optional, Dict, Any
 from langgraph.graph import StateGraph, END
-from app.core import get_bedrock_service, get_supabase_service
+from app.core import get_llm_batcher, get_supabase_service
+from app.agents._json_utils import extract_json
+import asyncio
+import hashlib
 import json
 import random
+import time
+
+# Quiz generations repeat heavily: students revisit the same topic within
+# minutes and cohort-mates share identical struggle/strength state. Cache the
+# generated questions under a content hash with a short TTL so a warm hit
+# skips the Bedrock call entirely.
+_QUIZ_CACHE: Dict[str, tuple] = {}
+_QUIZ_CACHE_TTL_SECONDS = 300.0
+_QUIZ_CACHE_MAX_ENTRIES = 256
+
+# Strong refs to in-flight memory-persistence tasks: the event loop keeps
+# only weak references, so an untracked fire-and-forget task can be
+# garbage-collected before it runs
+_PERSIST_TASKS: set = set()
+
+
+def _quiz_cache_key(
+    course_id: str,
+    topic: str,
+    difficulty: str,
+    struggles: List[str],
+    strengths: List[str],
+) -> str:
+    raw = f"{course_id}|{topic}|{difficulty}|{sorted(struggles)}|{sorted(strengths)}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
 
 
 class StudyState(TypedDict):
@@ -37,19 +65,28 @@ async def load_user_memory(state: StudyState) -> StudyState:
         for record in result.data:
             memory[record['memory_type']] = record['content']
         
-        return {**state, "user_memory": memory, "status": "memory_loaded"}
+        return {"user_memory": memory, "status": "memory_loaded"}
     except Exception as e:
-        return {**state, "user_memory": {}, "status": "memory_loaded"}
+        return {"user_memory": {}, "status": "memory_loaded"}
 
 
 async def generate_questions(state: StudyState) -> StudyState:
     """Generate quiz questions based on course content and user memory."""
-    bedrock = get_bedrock_service()
-    
+
     # Get struggle points from memory
     struggles = state['user_memory'].get('struggle', {}).get('topics', [])
     strengths = state['user_memory'].get('strength', {}).get('topics', [])
-    
+
+    cache_key = _quiz_cache_key(
+        state['course_id'], state['topic'], state['difficulty'], struggles, strengths
+    )
+    cached = _QUIZ_CACHE.get(cache_key)
+    if cached is not None:
+        questions, created_at = cached
+        if time.time() - created_at <= _QUIZ_CACHE_TTL_SECONDS:
+            return {"questions": questions, "current_question_idx": 0, "status": "questions_generated"}
+        _QUIZ_CACHE.pop(cache_key, None)
+
     difficulty_multiplier = {
         "easy": 0.7,
         "medium": 1.0,
@@ -78,23 +115,23 @@ async def generate_questions(state: StudyState) -> StudyState:
     - correct: index of correct answer (0-3)
     - difficulty: easy/medium/hard
     - topic: specific subtopic
-    - explanation: why the correct answer is correct
+    - explanation: 2-3 sentences on why the correct answer is right and the common mistake behind the wrong ones
     
     Return ONLY the JSON array."""
     
-    response = await bedrock.invoke_claude(
+    # Submit through the micro-batcher so quiz generations from concurrent
+    # students dispatch together instead of trickling in one at a time
+    response = await get_llm_batcher().submit(
         prompt,
         system_prompt="You are an expert educational quiz generator.",
         max_tokens=3000,
     )
     
     try:
-        response = response.strip()
-        if response.startswith("```"):
-            response = response.split("```")[1]
-            if response.startswith("json"):
-                response = response[4:]
-        questions = json.loads(response)
+        questions = extract_json(response)
+        if len(_QUIZ_CACHE) >= _QUIZ_CACHE_MAX_ENTRIES:
+            _QUIZ_CACHE.pop(next(iter(_QUIZ_CACHE)))
+        _QUIZ_CACHE[cache_key] = (questions, time.time())
     except json.JSONDecodeError:
         questions = [
             {
@@ -108,27 +145,39 @@ async def generate_questions(state: StudyState) -> StudyState:
             }
         ]
     
-    return {**state, "questions": questions, "current_question_idx": 0, "status": "questions_generated"}
+    return {"questions": questions, "current_question_idx": 0, "status": "questions_generated"}
 
 
 async def evaluate_answer(state: StudyState) -> StudyState:
     """Evaluate the user's answer and provide feedback."""
-    bedrock = get_bedrock_service()
-    
     current_q = state['questions'][state['current_question_idx']]
     is_correct = state['user_answer'] == current_q['correct']
     
     if is_correct:
         explanation = current_q.get('explanation', 'Correct!')
         next_action = "continue"
+    elif len(current_q.get('explanation') or '') > 80:
+        # The generator already produced a rich explanation for this
+        # question - reuse it instead of paying an LLM round-trip per
+        # wrong answer
+        explanation = current_q['explanation']
+        next_action = "reteach"
     else:
+        options = current_q['options']
+        answer_idx = state['user_answer']
+        their_answer = (
+            options[answer_idx]
+            if answer_idx is not None and 0 <= answer_idx < len(options)
+            else "No answer selected"
+        )
+
         # Generate a reteaching explanation
         prompt = f"""A student got this question wrong:
-        
+
         Question: {current_q['question']}
-        Their answer: {current_q['options'][state['user_answer']]}
-        Correct answer: {current_q['options'][current_q['correct']]}
-        
+        Their answer: {their_answer}
+        Correct answer: {options[current_q['correct']]}
+
         Provide a clear, encouraging explanation that:
         1. Explains why their answer was incorrect
         2. Explains why the correct answer is right
@@ -137,7 +186,7 @@ async def evaluate_answer(state: StudyState) -> StudyState:
         
         Keep it concise but thorough (100-150 words)."""
         
-        explanation = await bedrock.invoke_claude(
+        explanation = await get_llm_batcher().submit(
             prompt,
             system_prompt="You are a patient, encouraging tutor.",
             max_tokens=500,
@@ -145,7 +194,6 @@ async def evaluate_answer(state: StudyState) -> StudyState:
         next_action = "reteach"
     
     return {
-        **state,
         "is_correct": is_correct,
         "explanation": explanation,
         "next_action": next_action,
@@ -165,28 +213,29 @@ async def update_memory(state: StudyState) -> StudyState:
         memory_type = "strength"
     else:
         memory_type = "struggle"
-    
-    # Get existing memory
-    existing = state['user_memory'].get(memory_type, {"topics": [], "count": {}})
-    
-    if topic not in existing['topics']:
-        existing['topics'].append(topic)
-    
-    existing['count'] = existing.get('count', {})
-    existing['count'][topic] = existing['count'].get(topic, 0) + 1
-    
-    try:
-        # Upsert memory
-        await supabase.admin_client.table("user_memory").upsert({
-            "user_id": state['user_id'],
-            "memory_type": memory_type,
-            "content": existing,
-            "importance": existing['count'].get(topic, 1),
-        }).execute()
-    except Exception:
-        pass  # Non-critical operation
-    
-    return {**state, "status": "memory_updated"}
+
+    # The update_user_memory RPC (migration 005) does the read-modify-write
+    # atomically server-side - one round-trip instead of read + upsert, and
+    # no lost updates between concurrent sessions
+    async def _persist() -> None:
+        try:
+            await asyncio.to_thread(
+                supabase.admin_client.rpc("update_user_memory", {
+                    "p_user": state['user_id'],
+                    "p_type": memory_type,
+                    "p_topic": topic,
+                }).execute
+            )
+        except Exception:
+            pass  # Non-critical operation
+
+    # Fire-and-forget: the answer response does not wait on memory
+    # persistence, but the task is tracked so it can't be collected mid-flight
+    task = asyncio.create_task(_persist())
+    _PERSIST_TASKS.add(task)
+    task.add_done_callback(_PERSIST_TASKS.discard)
+
+    return {"status": "memory_updated"}
 
 
 def create_study_graph() -> StateGraph:
@@ -12,6 +12,7 @@ from .search_tools import (
 from .validation_tools import (
     execute_python_code,
     validate_statistical_claim,
+    validate_statistical_claims,
     score_hypothesis_testability,
     analyze_research_feasibility,
 )
@@ -35,7 +36,10 @@ NOVELTY_TOOLS = [
     search_semantic_scholar,
 ]
 
-ALL_TOOLS = RESEARCH_TOOLS + VALIDATION_TOOLS + NOVELTY_TOOLS
+# Deduplicated (search_semantic_scholar appears in both RESEARCH and
+# NOVELTY) and frozen as a tuple so agents binding the full registry don't
+# serialize duplicate tool specs on every model call
+ALL_TOOLS = tuple(dict.fromkeys(RESEARCH_TOOLS + VALIDATION_TOOLS + NOVELTY_TOOLS))
 
 __all__ = [
     "RESEARCH_TOOLS",
@@ -48,6 +52,7 @@ __all__ = [
     "find_related_concepts",
     "execute_python_code",
     "validate_statistical_claim",
+    "validate_statistical_claims",
     "score_hypothesis_testability",
     "analyze_research_feasibility",
 ]
@@ -4,64 +4,137 @@ Research search tools for hypothesis agents
 
 from typing import Optional, List, Dict, Any
 from langchain.tools import tool
-import httpx
+import asyncio
+import hashlib
 import logging
+import re
+import time
+from collections import Counter
+from lxml import etree
+from app.core.http import get_async_client
 
 logger = logging.getLogger(__name__)
 
+_ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+# Keyword extraction for find_related_concepts: compiled once, filtered inline
+_WORD_RE = re.compile(r'\b[a-z]{4,}\b')
+_STOPWORDS = frozenset({
+    'that', 'with', 'this', 'from', 'have', 'been', 'which', 'their', 'these', 'such'
+})
+
+# Agents looping over related-concept expansion re-issue identical queries;
+# cache responses by (endpoint, query, limit) with a TTL so repeats skip the
+# HTTP round-trip entirely
+_SEARCH_CACHE: Dict[str, tuple] = {}
+_SEARCH_CACHE_TTL_SECONDS = 24 * 3600.0
+_SEARCH_CACHE_MAX_ENTRIES = 1024
+
+
+def _cache_key(endpoint: str, query: str, limit: int) -> str:
+    return hashlib.blake2b(
+        f"{endpoint}|{query}|{limit}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[Any]:
+    entry = _SEARCH_CACHE.get(key)
+    if entry is None:
+        return None
+    value, created_at = entry
+    if time.time() - created_at > _SEARCH_CACHE_TTL_SECONDS:
+        _SEARCH_CACHE.pop(key, None)
+        return None
+    return value
+
+
+def _cache_put(key: str, value: Any) -> None:
+    if len(_SEARCH_CACHE) >= _SEARCH_CACHE_MAX_ENTRIES:
+        _SEARCH_CACHE.pop(next(iter(_SEARCH_CACHE)))
+    _SEARCH_CACHE[key] = (value, time.time())
+
 
 @tool
-def search_arxiv(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+async def search_arxiv(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
     """
     Search ArXiv for academic papers related to a query.
-    
+
     Args:
         query: Search query (keywords, concepts, or research topics)
         max_results: Maximum number of results to return (default 5)
-    
+
     Returns:
         List of papers with title, abstract, authors, and URL
     """
+    cache_key = _cache_key("arxiv", query, max_results)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        import arxiv
-        
-        search = arxiv.Search(
-            query=query,
-            max_results=max_results,
-            sort_by=arxiv.SortCriterion.Relevance
+        # The arxiv library blocks on urllib; hit the Atom API directly on
+        # the shared async client so the event loop keeps running
+        client = get_async_client()
+        response = await client.get(
+            "https://export.arxiv.org/api/query",
+            params={
+                "search_query": f"all:{query}",
+                "max_results": max_results,
+                "sortBy": "relevance",
+            },
+            timeout=10.0,
         )
-        
+        response.raise_for_status()
+
+        # lxml parses the Atom payload in C - far faster than feedparser's
+        # pure-Python scan, which dominated post-fetch time
+        root = etree.fromstring(response.content)
+
         results = []
-        for paper in search.results():
+        for entry in root.findall(f"{_ATOM_NS}entry"):
+            summary = " ".join((entry.findtext(f"{_ATOM_NS}summary") or "").split())
             results.append({
-                "title": paper.title,
-                "abstract": paper.summary[:500] + "..." if len(paper.summary) > 500 else paper.summary,
-                "authors": [author.name for author in paper.authors],
-                "published": paper.published.isoformat(),
-                "url": paper.entry_id,
-                "pdf_url": paper.pdf_url,
+                "title": " ".join((entry.findtext(f"{_ATOM_NS}title") or "").split()),
+                "abstract": summary[:500] + "..." if len(summary) > 500 else summary,
+                "authors": [
+                    author.findtext(f"{_ATOM_NS}name") or ""
+                    for author in entry.findall(f"{_ATOM_NS}author")
+                ],
+                "published": entry.findtext(f"{_ATOM_NS}published") or "",
+                "url": entry.findtext(f"{_ATOM_NS}id") or "",
+                "pdf_url": next(
+                    (link.get("href") for link in entry.findall(f"{_ATOM_NS}link")
+                     if link.get("type") == "application/pdf"),
+                    None,
+                ),
             })
-        
+
         logger.info(f"Found {len(results)} papers on ArXiv for query: {query}")
+        _cache_put(cache_key, results)
         return results
-        
+
     except Exception as e:
         logger.error(f"ArXiv search error: {e}")
         return [{"error": str(e)}]
 
 
 @tool
-def search_semantic_scholar(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+async def search_semantic_scholar(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """
     Search Semantic Scholar for academic papers with citation data.
-    
+
     Args:
         query: Search query (keywords or paper topics)
         limit: Maximum number of results (default 5)
-    
+
     Returns:
         List of papers with citations, influential citations, and metadata
     """
+    cache_key = _cache_key("semantic_scholar", query, limit)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         url = "https://api.semanticscholar.org/graph/v1/paper/search"
         params = {
@@ -69,18 +142,22 @@ def search_semantic_scholar(query: str, limit: int = 5) -> List[Dict[str, Any]]:
             "limit": limit,
             "fields": "title,abstract,authors,year,citationCount,influentialCitationCount,url,openAccessPdf"
         }
-        
-        response = httpx.get(url, params=params, timeout=10.0)
+
+        client = get_async_client()
+        response = await client.get(url, params=params, timeout=10.0)
         response.raise_for_status()
-        
+
         data = response.json()
         papers = data.get("data", [])
-        
+
         results = []
         for paper in papers:
+            # Slice only when actually over the limit - most abstracts fit,
+            # and the slice would otherwise copy every one of them
+            abstract = paper.get("abstract") or ""
             results.append({
                 "title": paper.get("title", ""),
-                "abstract": paper.get("abstract", "")[:500] if paper.get("abstract") else "",
+                "abstract": abstract if len(abstract) <= 500 else abstract[:500],
                 "authors": [a.get("name", "") for a in paper.get("authors", [])],
                 "year": paper.get("year"),
                 "citations": paper.get("citationCount", 0),
@@ -88,33 +165,42 @@ def search_semantic_scholar(query: str, limit: int = 5) -> List[Dict[str, Any]]:
                 "url": paper.get("url", ""),
                 "pdf_url": paper.get("openAccessPdf", {}).get("url") if paper.get("openAccessPdf") else None,
             })
-        
+
         logger.info(f"Found {len(results)} papers on Semantic Scholar for query: {query}")
+        _cache_put(cache_key, results)
         return results
-        
+
     except Exception as e:
         logger.error(f"Semantic Scholar search error: {e}")
         return [{"error": str(e)}]
 
 
 @tool
-def check_hypothesis_novelty(hypothesis: str) -> Dict[str, Any]:
+async def check_hypothesis_novelty(hypothesis: str) -> Dict[str, Any]:
     """
     Check if a hypothesis already exists in published literature.
-    
+
     Args:
         hypothesis: The hypothesis statement to check
-    
+
     Returns:
         Dictionary with novelty score and similar existing work
     """
     try:
-        # Search for similar work
-        papers = search_semantic_scholar.invoke({"query": hypothesis[:200], "limit": 3})
-        
-        if papers and not any("error" in p for p in papers):
+        # Query both sources concurrently over the shared client
+        scholar_papers, arxiv_papers = await asyncio.gather(
+            search_semantic_scholar.ainvoke({"query": hypothesis[:200], "limit": 3}),
+            search_arxiv.ainvoke({"query": hypothesis[:200], "max_results": 3}),
+        )
+
+        papers = [
+            p for p in scholar_papers + arxiv_papers
+            if isinstance(p, dict) and "error" not in p
+        ]
+
+        if papers:
             total_citations = sum(p.get("citations", 0) for p in papers if "citations" in p)
-            
+
             # Simple novelty heuristic
             if total_citations > 100:
                 novelty_score = 0.3  # Likely well-studied
@@ -122,62 +208,61 @@ def check_hypothesis_novelty(hypothesis: str) -> Dict[str, Any]:
                 novelty_score = 0.6  # Some existing work
             else:
                 novelty_score = 0.9  # Relatively novel
-            
+
             return {
                 "novelty_score": novelty_score,
                 "similar_papers_count": len(papers),
                 "similar_papers": papers,
-                "assessment": "High novelty - limited existing work" if novelty_score > 0.7 else 
+                "assessment": "High novelty - limited existing work" if novelty_score > 0.7 else
                              "Moderate novelty - some related research" if novelty_score > 0.4 else
                              "Low novelty - well-studied area"
             }
-        
+
         return {
             "novelty_score": 0.8,
             "similar_papers_count": 0,
             "similar_papers": [],
             "assessment": "No similar work found - potentially highly novel"
         }
-        
+
     except Exception as e:
         logger.error(f"Novelty check error: {e}")
         return {"error": str(e), "novelty_score": 0.5}
 
 
 @tool
-def find_related_concepts(concept: str, max_results: int = 5) -> List[str]:
+async def find_related_concepts(concept: str, max_results: int = 5) -> List[str]:
     """
     Find related research concepts and keywords using paper abstracts.
-    
+
     Args:
         concept: The concept to find related terms for
         max_results: Maximum number of related concepts to return
-    
+
     Returns:
         List of related concept strings
     """
     try:
         # Search papers about this concept
-        papers = search_arxiv.invoke({"query": concept, "max_results": 3})
-        
+        papers = await search_arxiv.ainvoke({"query": concept, "max_results": 3})
+
         if not papers or any("error" in p for p in papers):
             return []
-        
-        # Extract frequent terms from abstracts (simplified)
-        all_text = " ".join(p.get("abstract", "") for p in papers if "abstract" in p)
-        
-        # Simple keyword extraction (in production, use proper NLP)
-        import re
-        words = re.findall(r'\b[a-z]{4,}\b', all_text.lower())
-        from collections import Counter
-        common = Counter(words).most_common(max_results + 10)
-        
-        # Filter out stop words and the original concept
-        stopwords = {'that', 'with', 'this', 'from', 'have', 'been', 'which', 'their', 'these', 'such'}
-        related = [word for word, _ in common if word not in stopwords and word != concept.lower()]
-        
-        return related[:max_results]
-        
+
+        # Count frequent terms abstract-by-abstract with the stopword filter
+        # inlined, so no joined mega-string or second filtering pass is built
+        concept_lower = concept.lower()
+        counts: Counter = Counter()
+        for p in papers:
+            abstract = p.get("abstract")
+            if abstract:
+                counts.update(
+                    w for w in _WORD_RE.findall(abstract.lower())
+                    if w not in _STOPWORDS and w != concept_lower
+                )
+
+        return [word for word, _ in counts.most_common(max_results)]
+
     except Exception as e:
         logger.error(f"Related concepts error: {e}")
         return []
@@ -2,67 +2,181 @@
 Validation and analysis tools for hypothesis agents
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, FrozenSet, List, Optional
+from types import CodeType
 from langchain.tools import tool
+import ast
+import asyncio
+import hashlib
 import logging
-import json
+import math
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from io import StringIO
 
 logger = logging.getLogger(__name__)
 
+# Snippets run in a small pool of worker subprocesses: in-process exec
+# blocked the event loop and an LLM-generated `while True` could hang the
+# whole server. Workers carry CPU/memory rlimits as a backstop, and calls
+# time out without stalling other requests.
+_EXEC_TIMEOUT_SECONDS = 5.0
+_EXEC_POOL: Optional[ProcessPoolExecutor] = None
 
-@tool
-def execute_python_code(code: str) -> Dict[str, Any]:
-    """
-    Execute Python code for statistical validation or data analysis.
-    Use this for calculating statistics, running simulations, or validating mathematical claims.
-    
-    Args:
-        code: Python code to execute (must be safe and self-contained)
-    
-    Returns:
-        Dictionary with execution result, output, or error
-    """
+
+def _init_exec_worker() -> None:
     try:
-        import sys
-        from io import StringIO
-        import math
-        
-        # Capture stdout
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
-        
-        # Create safe execution environment
-        safe_globals = {
-            'math': math,
-            '__builtins__': {
-                'print': print,
-                'len': len,
-                'range': range,
-                'sum': sum,
-                'min': min,
-                'max': max,
-                'abs': abs,
-                'round': round,
-                'float': float,
-                'int': int,
-                'str': str,
-                'list': list,
-                'dict': dict,
-                'True': True,
-                'False': False,
-                'None': None,
-            }
-        }
-        
+        import resource
+        resource.setrlimit(resource.RLIMIT_CPU, (30, 30))
+        resource.setrlimit(resource.RLIMIT_AS, (512 * 1024 * 1024, 512 * 1024 * 1024))
+    except Exception:
+        pass  # resource is Unix-only; limits are best-effort elsewhere
+
+
+def _get_exec_pool() -> ProcessPoolExecutor:
+    global _EXEC_POOL
+    if _EXEC_POOL is None:
+        _EXEC_POOL = ProcessPoolExecutor(max_workers=2, initializer=_init_exec_worker)
+    return _EXEC_POOL
+
+# Agents retry validation snippets verbatim, so parse + compile (a large
+# fraction of runtime for short code) is cached by content hash. The AST
+# walk rejects unsafe constructs before anything is compiled - a stronger
+# gate than the trimmed __builtins__ alone.
+_CODE_CACHE: Dict[bytes, CodeType] = {}
+_CODE_CACHE_MAX_ENTRIES = 128
+
+_DENIED_NAMES = frozenset({
+    "eval", "exec", "compile", "open", "input", "__import__",
+    "globals", "locals", "vars", "getattr", "setattr", "delattr",
+})
+
+_SAFE_BUILTINS = {
+    'print': print,
+    'len': len,
+    'range': range,
+    'sum': sum,
+    'min': min,
+    'max': max,
+    'abs': abs,
+    'round': round,
+    'float': float,
+    'int': int,
+    'str': str,
+    'list': list,
+    'dict': dict,
+    'True': True,
+    'False': False,
+    'None': None,
+}
+
+
+class _SnippetValidator(ast.NodeVisitor):
+    """Rejects imports, dunder access, and denylisted names."""
+
+    def visit_Import(self, node: ast.Import) -> None:
+        raise ValueError("imports are not allowed")
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        raise ValueError("imports are not allowed")
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr.startswith("_"):
+            raise ValueError(f"access to '{node.attr}' is not allowed")
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if node.id in _DENIED_NAMES or node.id.startswith("__"):
+            raise ValueError(f"use of '{node.id}' is not allowed")
+        self.generic_visit(node)
+
+
+def _compile_snippet(code: str) -> CodeType:
+    """Validate and compile a snippet, caching code objects by content."""
+    digest = hashlib.blake2b(code.encode(), digest_size=16).digest()
+    cached = _CODE_CACHE.get(digest)
+    if cached is not None:
+        return cached
+
+    tree = ast.parse(code, mode="exec")
+    _SnippetValidator().visit(tree)
+    code_obj = compile(tree, "<tool>", "exec")
+
+    if len(_CODE_CACHE) >= _CODE_CACHE_MAX_ENTRIES:
+        _CODE_CACHE.pop(next(iter(_CODE_CACHE)))
+    _CODE_CACHE[digest] = code_obj
+    return code_obj
+
+# Each validator used to run ~20 separate `term in text.lower()` scans per
+# call. One compiled alternation per input now collects every trigger-term
+# hit in a single C-level pass; rules then test set membership. Alternatives
+# are sorted longest-first so multi-word terms win over their prefixes, and
+# no word boundaries are used, preserving the original substring semantics.
+
+
+def _term_pattern(*groups: FrozenSet[str]) -> "re.Pattern[str]":
+    terms = sorted(frozenset().union(*groups), key=len, reverse=True)
+    return re.compile("|".join(re.escape(term) for term in terms))
+
+
+def _scan_terms(text: str, pattern: "re.Pattern[str]") -> FrozenSet[str]:
+    return frozenset(pattern.findall(text.casefold()))
+
+
+# validate_statistical_claim
+_CORRELATION = frozenset({"correlation"})
+_CAUSATION = frozenset({"causation"})
+_SIGNIFICANT = frozenset({"significant"})
+_P_VALUE = frozenset({"p<", "p =", "p-value"})
+_OVERSTATED = frozenset({"proves", "confirms", "definitely"})
+_INTERVAL = frozenset({"interval"})
+_CLAIM_RE = _term_pattern(
+    _CORRELATION, _CAUSATION, _SIGNIFICANT, _P_VALUE, _OVERSTATED, _INTERVAL
+)
+
+_SAMPLE_SIZE = frozenset({"sample size"})
+_RIGOROUS_DESIGN = frozenset({"randomized", "controlled", "blind"})
+_SAMPLE = frozenset({"sample"})
+_DATA_RE = _term_pattern(_SAMPLE_SIZE, _RIGOROUS_DESIGN, _SAMPLE)
+
+# score_hypothesis_testability
+_MEASURABLE = frozenset({
+    "measure", "quantify", "count", "rate", "level", "amount", "frequency",
+    "correlation",
+})
+_PREDICTION = frozenset({
+    "increase", "decrease", "higher", "lower", "more", "less", "affect",
+    "influence",
+})
+_ABSOLUTE = frozenset({"always", "never", "all", "none", "every"})
+_TESTABILITY_RE = _term_pattern(_MEASURABLE, _PREDICTION, _ABSOLUTE)
+
+# analyze_research_feasibility
+_SPECIALIZED = frozenset({"neural", "brain", "quantum", "molecular"})
+_LONGITUDINAL = frozenset({"longitudinal", "long-term", "decades"})
+_HUMAN_SUBJECTS = frozenset({"human", "patient", "participant", "clinical"})
+_FEASIBILITY_RE = _term_pattern(_SPECIALIZED, _LONGITUDINAL, _HUMAN_SUBJECTS)
+
+
+def _run_snippet(code: str) -> Dict[str, Any]:
+    """Validate, compile, and execute a snippet (runs in a pool worker)."""
+    try:
+        # Validated + compiled once per distinct snippet; repeats skip both
+        code_obj = _compile_snippet(code)
+
+        safe_globals = {'math': math, '__builtins__': _SAFE_BUILTINS}
         local_vars = {}
-        
-        # Execute code
-        exec(code, safe_globals, local_vars)
-        
-        # Get output
-        output = sys.stdout.getvalue()
-        sys.stdout = old_stdout
-        
+
+        # redirect_stdout scopes the capture to this exec instead of
+        # swapping sys.stdout process-wide
+        captured = StringIO()
+        with redirect_stdout(captured):
+            exec(code_obj, safe_globals, local_vars)
+
+        output = captured.getvalue()
+
         # Get result (last assigned variable or None)
         result = local_vars.get('result', None)
         
@@ -70,7 +184,14 @@ def execute_python_code(code: str) -> Dict[str, Any]:
             "success": True,
             "output": output.strip() if output else None,
             "result": str(result) if result is not None else None,
-            "variables": {k: str(v) for k, v in local_vars.items() if not k.startswith('_')}
+            # Type names only: repr-ing every binding serializes arbitrarily
+            # large intermediates the agent never reads; "result" above is
+            # the one value it actually consumes
+            "variables": {
+                k: type(v).__name__
+                for k, v in local_vars.items()
+                if not k.startswith('_') and k != "result"
+            },
         }
         
     except Exception as e:
@@ -83,52 +204,96 @@ def execute_python_code(code: str) -> Dict[str, Any]:
 
 
 @tool
-def validate_statistical_claim(claim: str, data_description: str = "") -> Dict[str, Any]:
+async def execute_python_code(code: str) -> Dict[str, Any]:
     """
-    Validate statistical claims or research assertions using basic statistical reasoning.
-    
+    Execute Python code for statistical validation or data analysis.
+    Use this for calculating statistics, running simulations, or validating mathematical claims.
+
     Args:
-        claim: The statistical claim to validate
-        data_description: Optional description of data or methodology
-    
+        code: Python code to execute (must be safe and self-contained)
+
     Returns:
-        Dictionary with validation result and reasoning
+        Dictionary with execution result, output, or error
     """
+    global _EXEC_POOL
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_get_exec_pool(), _run_snippet, code),
+            timeout=_EXEC_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        return {
+            "success": False,
+            "error": f"execution exceeded {_EXEC_TIMEOUT_SECONDS}s",
+            "error_type": "TimeoutError",
+        }
+    except BrokenProcessPool:
+        # A snippet tripped the worker rlimits and killed its process,
+        # which permanently breaks the executor. Drop it so the next call
+        # builds a fresh pool instead of failing forever.
+        broken, _EXEC_POOL = _EXEC_POOL, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        return {
+            "success": False,
+            "error": "execution aborted (resource limits exceeded)",
+            "error_type": "BrokenProcessPool",
+        }
+    except Exception as e:
+        logger.error(f"Code execution error: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__,
+        }
+
+
+def _validate_claim(claim: str, data_description: str = "") -> Dict[str, Any]:
+    """Heuristic validation core shared by the tool and the batch API."""
     try:
         # Simple heuristic validation based on keywords
         confidence = 0.5
         warnings = []
-        
+
+        claim_hits = _scan_terms(claim, _CLAIM_RE)
+        data_hits = _scan_terms(data_description, _DATA_RE)
+
         # Check for common statistical issues
-        if "correlation" in claim.lower() and "causation" in claim.lower():
+        if claim_hits & _CORRELATION and claim_hits & _CAUSATION:
             warnings.append("⚠️ Correlation does not imply causation")
             confidence -= 0.2
-        
-        if "significant" in claim.lower() and not any(p in claim.lower() for p in ["p<", "p =", "p-value"]):
+
+        if claim_hits & _SIGNIFICANT and not claim_hits & _P_VALUE:
             warnings.append("⚠️ Significance claim without p-value")
             confidence -= 0.1
-        
-        if any(term in claim.lower() for term in ["proves", "confirms", "definitely"]):
+
+        if claim_hits & _OVERSTATED:
             warnings.append("⚠️ Overly strong language - science rarely 'proves' things")
             confidence -= 0.15
-        
-        if "sample size" in data_description.lower():
+
+        if data_hits & _SAMPLE_SIZE:
             confidence += 0.2
-            
-        if any(term in data_description.lower() for term in ["randomized", "controlled", "blind"]):
+
+        if data_hits & _RIGOROUS_DESIGN:
             confidence += 0.2
-        
+
         confidence = max(0.1, min(1.0, confidence))
-        
+
+        # Built imperatively so callers never have to filter None slots
+        recommendations = []
+        if not claim_hits & _INTERVAL:
+            recommendations.append("Include confidence intervals")
+        if not data_hits & (_SAMPLE | _SAMPLE_SIZE):
+            recommendations.append("Specify sample size")
+        if not data_description:
+            recommendations.append("Describe methodology")
+
         return {
             "valid": confidence > 0.5,
             "confidence": confidence,
             "warnings": warnings,
-            "recommendations": [
-                "Include confidence intervals" if "interval" not in claim.lower() else None,
-                "Specify sample size" if "sample" not in data_description.lower() else None,
-                "Describe methodology" if not data_description else None,
-            ],
+            "recommendations": recommendations,
             "assessment": "Valid claim with minor concerns" if confidence > 0.6 else
                          "Questionable claim - needs clarification" if confidence > 0.3 else
                          "Invalid or unsupported claim"
@@ -139,6 +304,34 @@ def validate_statistical_claim(claim: str, data_description: str = "") -> Dict[s
         return {"error": str(e)}
 
 
+@tool
+def validate_statistical_claim(claim: str, data_description: str = "") -> Dict[str, Any]:
+    """
+    Validate statistical claims or research assertions using basic statistical reasoning.
+
+    Args:
+        claim: The statistical claim to validate
+        data_description: Optional description of data or methodology
+
+    Returns:
+        Dictionary with validation result and reasoning
+    """
+    return _validate_claim(claim, data_description)
+
+
+def validate_statistical_claims(
+    claims: List[str], data_description: str = ""
+) -> List[Dict[str, Any]]:
+    """Validate many claims in one call, amortizing tool-call overhead.
+
+    Agents sweeping candidate phrasings previously paid a full tool
+    round-trip per claim. Each claim still costs exactly one scan of the
+    shared alternation; batching drops the per-call dispatch, which is
+    where the time went for short claim strings.
+    """
+    return [_validate_claim(claim, data_description) for claim in claims]
+
+
 @tool
 def score_hypothesis_testability(hypothesis: str, methodology: List[str] = None) -> Dict[str, Any]:
     """
@@ -154,25 +347,25 @@ def score_hypothesis_testability(hypothesis: str, methodology: List[str] = None)
     try:
         score = 0.5
         feedback = []
-        
+
+        hits = _scan_terms(hypothesis, _TESTABILITY_RE)
+
         # Check for measurable variables
-        measurable_terms = ["measure", "quantify", "count", "rate", "level", "amount", "frequency", "correlation"]
-        if any(term in hypothesis.lower() for term in measurable_terms):
+        if hits & _MEASURABLE:
             score += 0.2
             feedback.append("✓ Contains measurable variables")
         else:
             feedback.append("✗ Lacks clearly measurable variables")
-        
+
         # Check for specific predictions
-        prediction_terms = ["increase", "decrease", "higher", "lower", "more", "less", "affect", "influence"]
-        if any(term in hypothesis.lower() for term in prediction_terms):
+        if hits & _PREDICTION:
             score += 0.15
             feedback.append("✓ Makes specific predictions")
         else:
             feedback.append("✗ Predictions are vague")
-        
+
         # Check for falsifiability
-        if any(term in hypothesis.lower() for term in ["always", "never", "all", "none", "every"]):
+        if hits & _ABSOLUTE:
             score -= 0.1
             feedback.append("⚠️ Overly absolute - may not be falsifiable")
         else:
@@ -186,15 +379,19 @@ def score_hypothesis_testability(hypothesis: str, methodology: List[str] = None)
         
         score = max(0.0, min(1.0, score))
         
+        suggested_improvements = []
+        if score < 0.5:
+            suggested_improvements.append("Add measurable outcome variables")
+        if not hits & _PREDICTION:
+            suggested_improvements.append("Specify testable predictions")
+        if not methodology:
+            suggested_improvements.append("Define clear experimental conditions")
+
         return {
             "testability_score": score,
             "feedback": feedback,
             "is_testable": score > 0.6,
-            "suggested_improvements": [
-                "Add measurable outcome variables" if score < 0.5 else None,
-                "Specify testable predictions" if "prediction" not in " ".join(feedback).lower() else None,
-                "Define clear experimental conditions" if not methodology else None,
-            ],
+            "suggested_improvements": suggested_improvements,
             "assessment": "Highly testable hypothesis" if score > 0.75 else
                          "Moderately testable" if score > 0.5 else
                          "Difficult to test - needs refinement"
@@ -225,13 +422,15 @@ def analyze_research_feasibility(
     try:
         feasibility = 0.7
         challenges = []
-        
+
+        hits = _scan_terms(hypothesis, _FEASIBILITY_RE)
+
         # Check for complexity indicators
-        if any(term in hypothesis.lower() for term in ["neural", "brain", "quantum", "molecular"]):
+        if hits & _SPECIALIZED:
             feasibility -= 0.2
             challenges.append("Requires specialized equipment or expertise")
-        
-        if any(term in hypothesis.lower() for term in ["longitudinal", "long-term", "decades"]):
+
+        if hits & _LONGITUDINAL:
             feasibility -= 0.15
             challenges.append("Long-term study may be challenging")
         
@@ -244,21 +443,25 @@ def analyze_research_feasibility(
                 feasibility += 0.1
         
         # Ethical considerations
-        if any(term in hypothesis.lower() for term in ["human", "patient", "participant", "clinical"]):
+        if hits & _HUMAN_SUBJECTS:
             challenges.append("Requires IRB approval and ethical oversight")
             feasibility -= 0.05
         
         feasibility = max(0.1, min(1.0, feasibility))
         
+        recommendations = []
+        if feasibility < 0.4:
+            recommendations.append("Consider computational modeling as alternative")
+        if feasibility < 0.6:
+            recommendations.append("Start with pilot study")
+        if hits & _SPECIALIZED:
+            recommendations.append("Collaborate with specialized labs")
+
         return {
             "feasibility_score": feasibility,
             "challenges": challenges if challenges else ["No major challenges identified"],
             "is_feasible": feasibility > 0.5,
-            "recommendations": [
-                "Consider computational modeling as alternative" if feasibility < 0.4 else None,
-                "Start with pilot study" if feasibility < 0.6 else None,
-                "Collaborate with specialized labs" if "specialized" in str(challenges) else None,
-            ],
+            "recommendations": recommendations,
             "estimated_difficulty": "Low difficulty" if feasibility > 0.75 else
                                    "Moderate difficulty" if feasibility > 0.5 else
                                    "High difficulty - may need significant resources"
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from app.core import get_supabase_service
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from app.core import get_supabase_service, get_encoder
 from app.core.config import get_settings
+from app.core.http import get_async_client
+from app.core.openai import get_openai_client
 from app.api.deps import get_current_user
-from openai import AsyncOpenAI
-import httpx
+import asyncio
 import fitz  # PyMuPDF
+import hashlib
+import orjson
+import time
 
 router = APIRouter(prefix="/chat", tags=["Multilingual Chatbot"])
 
@@ -39,11 +45,87 @@ SUPPORTED_LANGUAGES = {
 }
 
 
+# Multi-turn chats hit the same PDF on every message; cache the truncated
+# context keyed by (pdf_id, updated_at) so only the first turn pays the
+# storage download and PyMuPDF parse. Per-key locks stop concurrent first
+# turns from re-extracting the same document.
+_PDF_CACHE: "OrderedDict[Tuple[str, str], Tuple[str, str]]" = OrderedDict()
+_PDF_CACHE_MAX_ENTRIES = 64
+
+# Token budget for conversation history sent to the model per turn
+_HISTORY_TOKEN_BUDGET = 6000
+
+# FAQ-style questions repeat across students; cache full replies keyed by
+# the exact message payload (which embeds history and the versioned PDF
+# context) plus target language. A hit skips both OpenAI and Sarvam.
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+_RESPONSE_CACHE_TTL_SECONDS = 24 * 3600.0
+_RESPONSE_CACHE_MAX_ENTRIES = 256
+
+# Server-side session history: clients that send a session_id stop
+# re-uploading (and the server stops re-parsing) the whole conversation on
+# every turn - only the new message travels. Keyed by (user_id, session_id)
+# so one user can never read or pollute another user's session.
+_SESSION_HISTORY: "OrderedDict[Tuple[str, str], List[dict]]" = OrderedDict()
+_SESSION_HISTORY_MAX_TURNS = 20
+_SESSION_HISTORY_MAX_SESSIONS = 512
+
+
+def _record_session_turn(
+    user_id: str, session_id: Optional[str], message: str, reply: str
+) -> None:
+    """Append the latest user/assistant exchange to a server-side session."""
+    if not session_id:
+        return
+    key = (user_id, session_id)
+    history = _SESSION_HISTORY.setdefault(key, [])
+    _SESSION_HISTORY.move_to_end(key)
+    history.append({"role": "user", "content": message})
+    history.append({"role": "assistant", "content": reply})
+    del history[:-2 * _SESSION_HISTORY_MAX_TURNS]
+    if len(_SESSION_HISTORY) > _SESSION_HISTORY_MAX_SESSIONS:
+        _SESSION_HISTORY.popitem(last=False)
+_PDF_CACHE_LOCKS: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+
+def _extract_pdf_text(content: bytes, limit: int = 12000) -> str:
+    """Extract up to ``limit`` chars of text from PDF bytes.
+
+    Synchronous on purpose: fitz parsing is CPU-bound, so callers run this
+    via asyncio.to_thread to keep the event loop free. Only ~12k chars fit
+    the chat context (~3k tokens), so the page loop stops as soon as the
+    budget is reached - a 300-page PDF parses only its first few pages.
+    """
+    doc = fitz.open(stream=content, filetype="pdf")
+    parts = []
+    total = 0
+    truncated = False
+    for page in doc:
+        text = page.get_text("text")
+        remaining = limit - total
+        if len(text) >= remaining:
+            # Keep only what the budget still allows of the final page
+            # instead of materializing its full text and slicing later
+            parts.append(text[:remaining])
+            truncated = len(text) > remaining
+            break
+        parts.append(text)
+        total += len(text)
+    doc.close()
+
+    full_text = "".join(parts)
+    if truncated:
+        full_text += "\n\n[...content truncated for length]"
+    return full_text
+
+
 class ChatRequest(BaseModel):
     message: str
     pdf_id: Optional[str] = None
     target_language: str = "en-IN"  # Default English (no translation needed)
     conversation_history: List[dict] = []
+    # When set, history is kept server-side and conversation_history is ignored
+    session_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -63,15 +145,9 @@ async def get_supported_languages():
     return {"languages": languages}
 
 
-@router.post("/send", response_model=ChatResponse)
-async def chat_with_pdf(
-    request: ChatRequest,
-    user: dict = Depends(get_current_user),
-):
-    """
-    Chat with GPT-4o-mini, optionally grounded on a selected PDF.
-    The English response is translated to the target Indian language via Sarvam API.
-    """
+async def _build_messages(request: ChatRequest, user: dict) -> List[dict]:
+    """Assemble the OpenAI message list: system prompt, optional PDF context,
+    token-budgeted history, and the new user turn."""
     supabase = get_supabase_service()
 
     # Build system prompt
@@ -96,19 +172,32 @@ async def chat_with_pdf(
 
             pdf = result.data[0]
 
-            # Download and extract text from PDF
-            content = supabase.download_file("course-materials", pdf["file_path"])
-            doc = fitz.open(stream=content, filetype="pdf")
-            full_text = ""
-            for page in doc:
-                full_text += page.get_text()
-            doc.close()
-
-            # Truncate to stay within token limits (~12k chars ≈ 3k tokens)
-            if len(full_text) > 12000:
-                full_text = full_text[:12000] + "\n\n[...content truncated for length]"
+            cache_key = (request.pdf_id, pdf.get("updated_at") or pdf.get("created_at") or "")
+            lock = _PDF_CACHE_LOCKS.setdefault(cache_key, asyncio.Lock())
+            async with lock:
+                cached = _PDF_CACHE.get(cache_key)
+                if cached is not None:
+                    _PDF_CACHE.move_to_end(cache_key)
+                    pdf_context = cached[1]
+                else:
+                    # Both the storage download and the fitz parse are
+                    # blocking; run them on worker threads so other chats
+                    # keep being served while this one loads its PDF
+                    content = await asyncio.to_thread(
+                        supabase.download_file, "course-materials", pdf["file_path"]
+                    )
+                    full_text = await asyncio.to_thread(_extract_pdf_text, content)
+
+                    # Cache the fully formatted context block so repeat
+                    # turns splice a ready string into the system message
+                    pdf_context = (
+                        f"\n\n--- PDF Content: {pdf['name']} ---\n{full_text}\n--- End of PDF ---"
+                    )
+                    _PDF_CACHE[cache_key] = (pdf["name"], pdf_context)
+                    if len(_PDF_CACHE) > _PDF_CACHE_MAX_ENTRIES:
+                        evicted, _ = _PDF_CACHE.popitem(last=False)
+                        _PDF_CACHE_LOCKS.pop(evicted, None)
 
-            pdf_context = f"\n\n--- PDF Content: {pdf['name']} ---\n{full_text}\n--- End of PDF ---"
             system_prompt += (
                 "\n\nYou have been given the content of a PDF document. "
                 "Use it to answer the user's questions accurately. "
@@ -124,18 +213,60 @@ async def chat_with_pdf(
     # Build message history for OpenAI
     messages = [{"role": "system", "content": system_prompt + pdf_context}]
 
-    # Add conversation history (limit to last 10 messages to stay within limits)
-    for msg in request.conversation_history[-10:]:
+    # Add conversation history, newest first under a token budget - a fixed
+    # message count let ten long replies blow past the context window while
+    # ten short ones wasted room that could hold more history
+    if request.session_id:
+        history = _SESSION_HISTORY.get((user["id"], request.session_id), [])
+    else:
+        history = request.conversation_history
+
+    budget = _HISTORY_TOKEN_BUDGET
+    encoder = get_encoder()
+    kept = []
+    for msg in reversed(history):
         role = msg.get("role", "user")
         content = msg.get("content", "")
-        if role in ("user", "assistant") and content:
-            messages.append({"role": role, "content": content})
+        if role not in ("user", "assistant") or not content:
+            continue
+        budget -= len(encoder.encode(content))
+        if budget < 0:
+            break
+        kept.append({"role": role, "content": content})
+    messages.extend(reversed(kept))
 
     messages.append({"role": "user", "content": request.message})
 
-    # Call GPT-4o-mini
+    return messages
+
+
+@router.post("/send", response_model=ChatResponse)
+async def chat_with_pdf(
+    request: ChatRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Chat with GPT-4o-mini, optionally grounded on a selected PDF.
+    The English response is translated to the target Indian language via Sarvam API.
+    """
+    messages = await _build_messages(request, user)
+
+    cache_key = hashlib.sha256(
+        orjson.dumps([messages, request.target_language])
+    ).hexdigest()
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        payload, created_at = cached
+        if time.time() - created_at <= _RESPONSE_CACHE_TTL_SECONDS:
+            _RESPONSE_CACHE.move_to_end(cache_key)
+            _record_session_turn(user["id"], request.session_id, request.message, payload["reply"])
+            return ChatResponse(**payload)
+        _RESPONSE_CACHE.pop(cache_key, None)
+
+    # Call GPT-4o-mini on the shared cached client - building AsyncOpenAI
+    # per request allocated a fresh connection pool and lost keep-alive
     try:
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client()
         response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
@@ -149,6 +280,7 @@ async def chat_with_pdf(
 
     # Translate if target language is not English
     translated_reply = None
+    translation_failed = False
     lang_code = request.target_language
     lang_name = SUPPORTED_LANGUAGES.get(lang_code, "English")
 
@@ -159,13 +291,100 @@ async def chat_with_pdf(
             print(f"Sarvam translation error: {e}")
             # Return English reply even if translation fails
             translated_reply = None
+            translation_failed = True
 
-    return ChatResponse(
-        reply=english_reply,
-        translated_reply=translated_reply,
-        language=lang_code,
-        language_name=lang_name,
-    )
+    payload = {
+        "reply": english_reply,
+        "translated_reply": translated_reply,
+        "language": lang_code,
+        "language_name": lang_name,
+    }
+    # Never cache a degraded payload: a transient Sarvam outage would
+    # otherwise pin English-only replies for the full TTL instead of
+    # letting the next identical request retry translation
+    if not translation_failed:
+        _RESPONSE_CACHE[cache_key] = (payload, time.time())
+        if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAX_ENTRIES:
+            _RESPONSE_CACHE.popitem(last=False)
+
+    _record_session_turn(user["id"], request.session_id, request.message, english_reply)
+
+    return ChatResponse(**payload)
+
+
+@router.post("/stream")
+async def chat_with_pdf_stream(
+    request: ChatRequest,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Stream the reply token-by-token over SSE instead of waiting for the full
+    completion. Sentence-complete buffers are handed to Sarvam while the
+    model is still generating, so translation overlaps generation and the
+    final frame arrives in ~max(LLM, translate) instead of their sum.
+    """
+    messages = await _build_messages(request, user)
+    lang_code = request.target_language
+    translate = bool(lang_code and lang_code != "en-IN")
+
+    async def _event_stream():
+        client = get_openai_client()
+        try:
+            stream = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=messages,
+                max_tokens=2048,
+                temperature=0.7,
+                stream=True,
+            )
+        except Exception as e:
+            print(f"OpenAI error: {e}")
+            yield b'event: error\ndata: {"detail": "Failed to generate AI response"}\n\n'
+            return
+
+        buffer = ""
+        reply_parts: List[str] = []
+        tasks: List[asyncio.Task] = []
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            delta = chunk.choices[0].delta.content
+            reply_parts.append(delta)
+            yield b"data: " + orjson.dumps({"en": delta}) + b"\n\n"
+
+            if translate:
+                buffer += delta
+                # Translate as soon as a sentence/line completes (or the
+                # buffer nears Sarvam's per-request limit)
+                if len(buffer) >= 900 or buffer.endswith((". ", ".\n", "!\n", "?\n", "\n\n")):
+                    tasks.append(asyncio.create_task(
+                        translate_with_sarvam(buffer, lang_code)
+                    ))
+                    buffer = ""
+
+        if translate:
+            if buffer.strip():
+                tasks.append(asyncio.create_task(
+                    translate_with_sarvam(buffer, lang_code)
+                ))
+            translated_parts = []
+            for task in tasks:
+                try:
+                    translated_parts.append(await task)
+                except Exception as e:
+                    print(f"Sarvam translation error: {e}")
+            if translated_parts:
+                yield (
+                    b"event: translated\ndata: "
+                    + orjson.dumps({"text": " ".join(translated_parts)})
+                    + b"\n\n"
+                )
+
+        _record_session_turn(user["id"], request.session_id, request.message, "".join(reply_parts))
+
+        yield b"data: [DONE]\n\n"
+
+    return StreamingResponse(_event_stream(), media_type="text/event-stream")
 
 
 async def translate_with_sarvam(text: str, target_language_code: str) -> str:
@@ -175,60 +394,80 @@ async def translate_with_sarvam(text: str, target_language_code: str) -> str:
 
     # Sarvam mayura:v1 has a 1000 char limit per request, so chunk if needed
     chunks = _split_text_for_translation(text, max_chars=900)
-    translated_chunks = []
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for chunk in chunks:
-            payload = {
-                "input": chunk,
-                "source_language_code": "en-IN",
-                "target_language_code": target_language_code,
-                "model": "mayura:v1",
-                "mode": "formal",
-            }
-
-            response = await client.post(
-                "https://api.sarvam.ai/translate",
-                json=payload,
-                headers={
-                    "api-subscription-key": settings.SARVAM_API_KEY,
-                    "Content-Type": "application/json",
-                },
+
+    # All chunks fly concurrently over the shared pooled client - wall time
+    # is one round-trip instead of one per chunk, and gather keeps the
+    # results in chunk order
+    client = get_async_client()
+    headers = {
+        "api-subscription-key": settings.SARVAM_API_KEY,
+        "Content-Type": "application/json",
+    }
+
+    async def _translate_chunk(chunk: str) -> str:
+        payload = {
+            "input": chunk,
+            "source_language_code": "en-IN",
+            "target_language_code": target_language_code,
+            "model": "mayura:v1",
+            "mode": "formal",
+        }
+
+        # orjson encodes/decodes the payload in C and skips httpx's stdlib
+        # json round-trip
+        response = await client.post(
+            "https://api.sarvam.ai/translate",
+            content=orjson.dumps(payload),
+            headers=headers,
+            timeout=30.0,
+        )
+
+        if response.status_code != 200:
+            error_detail = response.text
+            print(f"Sarvam API error ({response.status_code}): {error_detail}")
+            raise HTTPException(
+                status_code=502,
+                detail=f"Translation failed: {response.status_code}",
             )
 
-            if response.status_code != 200:
-                error_detail = response.text
-                print(f"Sarvam API error ({response.status_code}): {error_detail}")
-                raise HTTPException(
-                    status_code=502,
-                    detail=f"Translation failed: {response.status_code}",
-                )
+        return orjson.loads(response.content).get("translated_text", chunk)
 
-            data = response.json()
-            translated_chunks.append(data.get("translated_text", chunk))
+    translated_chunks = await asyncio.gather(
+        *(_translate_chunk(chunk) for chunk in chunks)
+    )
 
     return " ".join(translated_chunks)
 
 
 def _split_text_for_translation(text: str, max_chars: int = 900) -> list[str]:
-    """Split text into chunks that respect sentence boundaries."""
+    """Split text into chunks that respect sentence boundaries.
+
+    Greedy single pass over the original string: each chunk ends at the
+    last sentence/line boundary inside its max_chars window (found with
+    C-level rfind), falling back to a hard cut when a run has no boundary.
+    No modified copy of the text and no repeated concatenation.
+    """
     if len(text) <= max_chars:
         return [text]
 
     chunks = []
-    current = ""
-    sentences = text.replace("\n", " \n ").split(". ")
-
-    for sentence in sentences:
-        candidate = (current + ". " + sentence).strip(". ") if current else sentence
-        if len(candidate) > max_chars:
-            if current:
-                chunks.append(current.strip())
-            current = sentence
-        else:
-            current = candidate
-
-    if current.strip():
-        chunks.append(current.strip())
+    start = 0
+    length = len(text)
+
+    while length - start > max_chars:
+        window_end = start + max_chars
+        boundary = max(
+            text.rfind(ch, start, window_end) for ch in (".", "!", "?", "\n")
+        )
+        if boundary <= start:
+            boundary = window_end - 1
+        chunk = text[start:boundary + 1].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = boundary + 1
+
+    tail = text[start:].strip()
+    if tail:
+        chunks.append(tail)
 
     return chunks if chunks else [text[:max_chars]]
\ No newline at end of file
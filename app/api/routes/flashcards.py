@@ -1,13 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+from collections import Counter
 from datetime import datetime, timedelta
 from app.core import get_supabase_service
 from app.api.deps import get_current_user
+import asyncio
+import fitz  # PyMuPDF
 import uuid
 import json
 import math
-import boto3
+from app.core.bedrock import get_bedrock_client
 from app.core.config import get_settings
 
 router = APIRouter(prefix="/flashcards", tags=["Flashcards"])
@@ -122,14 +125,9 @@ def calculate_sm2(quality: int, repetitions: int, ease_factor: float, interval:
 
 # ============ AI Flashcard Generation ============
 
-def get_bedrock_client():
-    """Get AWS Bedrock client."""
-    return boto3.client(
-        "bedrock-runtime",
-        region_name=settings.AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    )
+# generate_flashcards_from_content slices its input to this many chars;
+# extracting past the budget is wasted parsing
+_CONTENT_CHAR_BUDGET = 30000
 
 
 async def generate_flashcards_from_content(
@@ -157,7 +155,7 @@ Difficulty level: {difficulty_instructions.get(difficulty, difficulty_instructio
 {topics_instruction}
 
 Study Material:
-{content[:30000]}
+{content[:_CONTENT_CHAR_BUDGET]}
 
 Generate flashcards that will help students memorize and understand the key concepts.
 Each flashcard should have:
@@ -181,8 +179,11 @@ Important:
 
     try:
         client = get_bedrock_client()
-        
-        response = client.invoke_model(
+
+        # boto3 is sync - run the multi-second Bedrock call on a worker
+        # thread so the event loop keeps serving other requests
+        response = await asyncio.to_thread(
+            client.invoke_model,
             modelId=settings.BEDROCK_MODEL_ID,
             body=json.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
@@ -192,7 +193,7 @@ Important:
                 "system": "You are an expert educator creating flashcards. Always return valid JSON arrays only, no other text."
             })
         )
-        
+
         response_body = json.loads(response["body"].read())
         result_text = response_body["content"][0]["text"]
         
@@ -229,16 +230,17 @@ async def get_decks(user: dict = Depends(get_current_user)):
     result = supabase.admin_client.table("flashcard_decks").select(
         "*, subjects(name)"
     ).eq("user_id", user["id"]).order("updated_at", desc=True).execute()
-    
+
+    # One query for all due cards instead of a count per deck - with N decks
+    # the old loop paid N+1 round-trips to Supabase
+    now_iso = datetime.utcnow().isoformat()
+    due_result = supabase.admin_client.table("flashcards").select(
+        "deck_id"
+    ).eq("user_id", user["id"]).lte("next_review_date", now_iso).execute()
+    due_counts = Counter(row["deck_id"] for row in due_result.data or [])
+
     decks = []
     for d in result.data or []:
-        # Get due cards count
-        due_result = supabase.admin_client.table("flashcards").select(
-            "id", count="exact"
-        ).eq("deck_id", d["id"]).lte(
-            "next_review_date", datetime.utcnow().isoformat()
-        ).execute()
-        
         decks.append({
             "id": d["id"],
             "name": d["name"],
@@ -247,7 +249,7 @@ async def get_decks(user: dict = Depends(get_current_user)):
             "color": d.get("color", "#6366F1"),
             "card_count": d.get("card_count", 0),
             "mastered_count": d.get("mastered_count", 0),
-            "due_count": due_result.count or 0,
+            "due_count": due_counts.get(d["id"], 0),
             "created_at": d["created_at"],
             "updated_at": d["updated_at"],
         })
@@ -306,11 +308,10 @@ async def get_deck(deck_id: str, user: dict = Depends(get_current_user)):
     ).order("created_at").execute()
     
     # Get due count
+    now_iso = datetime.utcnow().isoformat()
     due_result = supabase.admin_client.table("flashcards").select(
         "id", count="exact"
-    ).eq("deck_id", deck_id).lte(
-        "next_review_date", datetime.utcnow().isoformat()
-    ).execute()
+    ).eq("deck_id", deck_id).lte("next_review_date", now_iso).execute()
     
     return {
         "deck": {
@@ -349,8 +350,10 @@ async def update_deck(
 ):
     """Update a deck."""
     supabase = get_supabase_service()
-    
-    update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+
+    # exclude_unset walks only the fields the client sent - and lets an
+    # explicit null clear a field, which the old None-filter swallowed
+    update_data = data.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow().isoformat()
     
     result = supabase.admin_client.table("flashcard_decks").update(
@@ -422,8 +425,8 @@ async def update_card(
 ):
     """Update a flashcard."""
     supabase = get_supabase_service()
-    
-    update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+
+    update_data = data.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow().isoformat()
     
     result = supabase.admin_client.table("flashcards").update(
@@ -447,6 +450,28 @@ async def delete_card(card_id: str, user: dict = Depends(get_current_user)):
 
 # ============ AI Generation Endpoint ============
 
+def _extract_pdf_text(pdf_bytes: bytes, limit: int = _CONTENT_CHAR_BUDGET) -> str:
+    """Extract plain text from a PDF (blocking - run on a worker thread).
+
+    Stops once ``limit`` characters are collected so a thousand-page
+    document doesn't get fully parsed just to be truncated downstream.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        parts = []
+        total = 0
+        # Fixed "text" mode skips PyMuPDF's per-page format dispatch
+        for page in doc:
+            text = page.get_text("text")
+            parts.append(text)
+            total += len(text)
+            if total >= limit:
+                break
+        return "".join(parts)
+    finally:
+        doc.close()
+
+
 @router.post("/generate")
 async def generate_flashcards(
     data: GenerateFlashcardsRequest,
@@ -467,33 +492,37 @@ async def generate_flashcards(
         "color": "#EC4899",
     }).execute()
     
-    # Get PDF content
-    combined_content = ""
-    for pdf_id in data.pdf_ids:
-        pdf_result = supabase.admin_client.table("space_pdfs").select("*").eq(
-            "id", pdf_id
-        ).eq("user_id", user["id"]).single().execute()
-        
-        if pdf_result.data:
-            # Get text content if stored, otherwise use filename
-            combined_content += f"\n\n--- From: {pdf_result.data['name']} ---\n"
-            if pdf_result.data.get("extracted_text"):
-                combined_content += pdf_result.data["extracted_text"]
-            else:
-                # Download and extract PDF text
-                try:
-                    pdf_bytes = supabase.download_file(
-                        "course-materials", 
-                        pdf_result.data["file_path"]
-                    )
-                    import fitz  # PyMuPDF
-                    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-                    for page in doc:
-                        combined_content += page.get_text()
-                    doc.close()
-                except Exception as e:
-                    print(f"Error extracting PDF {pdf_id}: {e}")
-                    combined_content += f"[Content from {pdf_result.data['name']}]"
+    # Fetch and extract every PDF concurrently - the select, storage
+    # download, and PyMuPDF parse all run on worker threads, so K PDFs
+    # cost roughly the slowest one instead of the sum
+    async def _fetch_and_extract(pdf_id: str) -> str:
+        pdf_result = await asyncio.to_thread(
+            lambda: supabase.admin_client.table("space_pdfs").select("*").eq(
+                "id", pdf_id
+            ).eq("user_id", user["id"]).single().execute()
+        )
+
+        if not pdf_result.data:
+            return ""
+
+        header = f"\n\n--- From: {pdf_result.data['name']} ---\n"
+        # Use stored text if available, otherwise download and extract
+        if pdf_result.data.get("extracted_text"):
+            return header + pdf_result.data["extracted_text"]
+
+        try:
+            pdf_bytes = await asyncio.to_thread(
+                supabase.download_file,
+                "course-materials",
+                pdf_result.data["file_path"],
+            )
+            return header + await asyncio.to_thread(_extract_pdf_text, pdf_bytes)
+        except Exception as e:
+            print(f"Error extracting PDF {pdf_id}: {e}")
+            return header + f"[Content from {pdf_result.data['name']}]"
+
+    texts = await asyncio.gather(*(_fetch_and_extract(p) for p in data.pdf_ids))
+    combined_content = "".join(texts)
     
     # Generate flashcards using AI
     flashcards = await generate_flashcards_from_content(
@@ -503,11 +532,14 @@ async def generate_flashcards(
         data.focus_topics
     )
     
-    # Insert flashcards into database
+    # Insert all flashcards in one request - a per-card insert paid one
+    # Supabase round-trip per generated card
+    now_iso = datetime.utcnow().isoformat()
+    rows = []
     created_cards = []
     for card in flashcards:
         card_id = str(uuid.uuid4())
-        supabase.admin_client.table("flashcards").insert({
+        rows.append({
             "id": card_id,
             "deck_id": deck_id,
             "user_id": user["id"],
@@ -516,13 +548,15 @@ async def generate_flashcards(
             "hint": card.get("hint"),
             "tags": card.get("tags", []),
             "source_pdf_id": data.pdf_ids[0] if data.pdf_ids else None,
-            "next_review_date": datetime.utcnow().isoformat(),
-        }).execute()
+            "next_review_date": now_iso,
+        })
         created_cards.append({
             "id": card_id,
             **card,
             "status": "new"
         })
+    if rows:
+        supabase.admin_client.table("flashcards").insert(rows).execute()
     
     return {
         "success": True,
@@ -551,7 +585,8 @@ async def get_due_cards(
     
     # If practice_mode is False, only get cards due for review
     if not practice_mode:
-        query = query.lte("next_review_date", datetime.utcnow().isoformat())
+        now_iso = datetime.utcnow().isoformat()
+        query = query.lte("next_review_date", now_iso)
     
     query = query.order("next_review_date").limit(limit)
     
@@ -591,57 +626,22 @@ async def submit_review(
 ):
     """Submit a review for a flashcard and update spaced repetition data."""
     supabase = get_supabase_service()
-    
-    # Get current card state
-    card_result = supabase.admin_client.table("flashcards").select("*").eq(
-        "id", data.flashcard_id
-    ).eq("user_id", user["id"]).single().execute()
-    
-    if not card_result.data:
-        raise HTTPException(status_code=404, detail="Card not found")
-    
-    card = card_result.data
-    
-    # Calculate new SM-2 values
-    new_reps, new_ease, new_interval, new_status = calculate_sm2(
-        quality=data.quality,
-        repetitions=card.get("repetitions", 0),
-        ease_factor=card.get("ease_factor", 2.5),
-        interval=card.get("interval_days", 0)
-    )
-    
-    # Calculate next review date
-    next_review = datetime.utcnow() + timedelta(days=new_interval)
-    
-    # Record the review
-    supabase.admin_client.table("flashcard_reviews").insert({
-        "id": str(uuid.uuid4()),
-        "flashcard_id": data.flashcard_id,
-        "user_id": user["id"],
-        "quality": data.quality,
-        "response_time_ms": data.response_time_ms,
-        "previous_interval": card.get("interval_days", 0),
-        "previous_ease_factor": card.get("ease_factor", 2.5),
+
+    # One RPC does the SM-2 math, records the review, and updates the
+    # card atomically - see migrations/006_flashcard_review_rpc.sql.
+    # The old SELECT + INSERT + UPDATE paid three round-trips per button
+    # press and could leave a review without its card update on a crash.
+    result = supabase.admin_client.rpc("fn_submit_review", {
+        "p_card": data.flashcard_id,
+        "p_user": user["id"],
+        "p_quality": data.quality,
+        "p_rt_ms": data.response_time_ms,
     }).execute()
-    
-    # Update the card
-    supabase.admin_client.table("flashcards").update({
-        "repetitions": new_reps,
-        "ease_factor": new_ease,
-        "interval_days": new_interval,
-        "status": new_status,
-        "next_review_date": next_review.isoformat(),
-        "last_reviewed_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat(),
-    }).eq("id", data.flashcard_id).execute()
-    
-    return {
-        "success": True,
-        "new_status": new_status,
-        "next_review_date": next_review.isoformat(),
-        "interval_days": new_interval,
-        "ease_factor": round(new_ease, 2),
-    }
+
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Card not found")
+
+    return {"success": True, **result.data}
 
 
 @router.post("/study/session/start")
@@ -687,59 +687,21 @@ async def end_study_session(
 async def get_flashcard_stats(user: dict = Depends(get_current_user)):
     """Get overall flashcard statistics."""
     supabase = get_supabase_service()
-    
-    # Total cards by status
-    cards_result = supabase.admin_client.table("flashcards").select(
-        "status"
-    ).eq("user_id", user["id"]).execute()
-    
-    status_counts = {"new": 0, "learning": 0, "reviewing": 0, "mastered": 0}
-    for card in cards_result.data or []:
-        status = card.get("status", "new")
-        status_counts[status] = status_counts.get(status, 0) + 1
-    
-    total_cards = sum(status_counts.values())
-    
-    # Due today
-    due_result = supabase.admin_client.table("flashcards").select(
-        "id", count="exact"
-    ).eq("user_id", user["id"]).lte(
-        "next_review_date", datetime.utcnow().isoformat()
-    ).execute()
-    
-    # Recent reviews (last 7 days)
-    week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-    reviews_result = supabase.admin_client.table("flashcard_reviews").select(
-        "quality"
-    ).eq("user_id", user["id"]).gte("reviewed_at", week_ago).execute()
-    
-    total_reviews = len(reviews_result.data or [])
-    correct_reviews = sum(1 for r in (reviews_result.data or []) if r.get("quality", 0) >= 3)
-    
-    # Study streak (days with at least one review)
-    sessions_result = supabase.admin_client.table("flashcard_study_sessions").select(
-        "started_at"
-    ).eq("user_id", user["id"]).order("started_at", desc=True).limit(30).execute()
-    
-    streak = 0
-    if sessions_result.data:
-        dates = set()
-        for s in sessions_result.data:
-            date = s["started_at"][:10]
-            dates.add(date)
-        
-        # Count consecutive days from today
-        check_date = datetime.utcnow().date()
-        while check_date.isoformat() in dates:
-            streak += 1
-            check_date -= timedelta(days=1)
-    
-    return {
-        "total_cards": total_cards,
-        "status_counts": status_counts,
-        "due_today": due_result.count or 0,
-        "mastery_percentage": round(status_counts["mastered"] / total_cards * 100, 1) if total_cards > 0 else 0,
-        "weekly_reviews": total_reviews,
-        "weekly_accuracy": round(correct_reviews / total_reviews * 100, 1) if total_reviews > 0 else 0,
-        "study_streak": streak,
+
+    # All counts are aggregated in Postgres and returned pre-baked - see
+    # migrations/007_flashcard_stats_rpc.sql. The old version streamed
+    # every card, a week of reviews, and 30 sessions into Python just to
+    # count them.
+    result = supabase.admin_client.rpc("fn_flashcard_stats", {
+        "p_user": user["id"],
+    }).execute()
+
+    return result.data or {
+        "total_cards": 0,
+        "status_counts": {"new": 0, "learning": 0, "reviewing": 0, "mastered": 0},
+        "due_today": 0,
+        "mastery_percentage": 0,
+        "weekly_reviews": 0,
+        "weekly_accuracy": 0,
+        "study_streak": 0,
     }
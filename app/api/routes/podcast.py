@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from app.models import (
     PodcastCreateRequest,
     TaskResponse,
@@ -8,8 +10,9 @@ from app.models import (
 from app.core import get_supabase_service
 from app.agents import get_podcast_agent
 from app.api.deps import get_current_user
+from app.services import get_elevenlabs_service
 import uuid
-from typing import Dict
+from typing import Dict, List
 import asyncio
 
 router = APIRouter(prefix="/podcast", tags=["Neural Podcast"])
@@ -256,6 +259,33 @@ async def get_podcast_status(
     )
 
 
+class ScriptStreamRequest(BaseModel):
+    script: List[dict]
+
+
+@router.post("/stream-audio")
+async def stream_podcast_audio(
+    request: ScriptStreamRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream dialogue audio as it is synthesized.
+
+    Segments are forwarded the moment each one is ready, so playback can
+    start after one line's synthesis latency instead of waiting for the
+    whole episode to be generated and uploaded. The body is a single
+    progressive WAV stream (stream_dialogue merges the per-line Sarvam
+    files), so a plain <audio> element can play it end to end.
+    """
+    if not request.script:
+        raise HTTPException(status_code=400, detail="Script must not be empty")
+
+    tts = get_elevenlabs_service()
+    return StreamingResponse(
+        tts.stream_dialogue(request.script),
+        media_type="audio/wav",
+    )
+
+
 @router.get("/list")
 async def list_podcasts(
     current_user: dict = Depends(get_current_user),
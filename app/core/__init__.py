@@ -2,6 +2,10 @@
 from app.core.config import get_settings, Settings
 from app.core.supabase import get_supabase_service, SupabaseService
 from app.core.bedrock import get_bedrock_service, BedrockService
+from app.core.llm_cache import cached_invoke, cached_openai_invoke
+from app.core.llm_batcher import get_llm_batcher, LLMBatcher
+from app.core.tokens import get_encoder, truncate_to_tokens
+from app.core.http import get_async_client, close_async_client
 from app.core.openai import get_openai_service, OpenAIService
 from app.core.neo4j import get_neo4j_service, Neo4jService
 
@@ -12,6 +16,14 @@ __all__ = [
     "SupabaseService",
     "get_bedrock_service",
     "BedrockService",
+    "cached_invoke",
+    "cached_openai_invoke",
+    "get_llm_batcher",
+    "LLMBatcher",
+    "get_encoder",
+    "truncate_to_tokens",
+    "get_async_client",
+    "close_async_client",
     "get_openai_service",
     "OpenAIService",
     "get_neo4j_service",
@@ -1,4 +1,6 @@
+import asyncio
 import boto3
+from botocore.config import Config
 from functools import lru_cache
 from typing import Optional, List, Dict, Any
 import json
@@ -15,15 +17,31 @@ def get_bedrock_client():
         region_name=settings.AWS_REGION,
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        # Default pool is 10 connections - too small once concurrent
+        # endpoints share this one client; cap retries so a Bedrock brownout
+        # fails fast instead of stacking backoff behind user requests
+        config=Config(max_pool_connections=50, retries={"max_attempts": 2}),
     )
 
 
 class BedrockService:
     """Service class for AWS Bedrock operations."""
-    
+
     def __init__(self):
         self.client = get_bedrock_client()
-    
+
+    async def _invoke_model(self, **kwargs) -> Dict[str, Any]:
+        """Run the sync boto3 call (and its body read) on a worker thread.
+
+        boto3 blocks for the full model round-trip; inline it would freeze
+        the event loop and serialize every gather fan-out over this service.
+        """
+        def _call():
+            response = self.client.invoke_model(**kwargs)
+            return json.loads(response["body"].read())
+
+        return await asyncio.to_thread(_call)
+
     async def invoke_claude(
         self,
         prompt: str,
@@ -43,15 +61,54 @@ class BedrockService:
         
         if system_prompt:
             body["system"] = system_prompt
-        
-        response = self.client.invoke_model(
+
+        response_body = await self._invoke_model(
             modelId=settings.BEDROCK_MODEL_ID,
             body=json.dumps(body),
         )
-        
-        response_body = json.loads(response["body"].read())
         return response_body["content"][0]["text"]
-    
+
+    async def invoke_claude_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ):
+        """Invoke Claude on Bedrock, yielding response text chunks as they arrive."""
+        messages = [{"role": "user", "content": prompt}]
+
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": messages,
+        }
+
+        if system_prompt:
+            body["system"] = system_prompt
+
+        # Both the initial call and each EventStream read are blocking
+        # network I/O; pump them from worker threads so concurrent
+        # requests keep flowing while chunks trickle in
+        response = await asyncio.to_thread(
+            self.client.invoke_model_with_response_stream,
+            modelId=settings.BEDROCK_MODEL_ID,
+            body=json.dumps(body),
+        )
+
+        stream = iter(response["body"])
+        done = object()
+        while True:
+            event = await asyncio.to_thread(next, stream, done)
+            if event is done:
+                break
+            chunk = json.loads(event["chunk"]["bytes"])
+            if chunk.get("type") == "content_block_delta":
+                delta = chunk.get("delta", {})
+                if delta.get("type") == "text_delta":
+                    yield delta.get("text", "")
+
     async def invoke_claude_vision(
         self,
         prompt: str,
@@ -86,15 +143,13 @@ class BedrockService:
         
         if system_prompt:
             body["system"] = system_prompt
-        
-        response = self.client.invoke_model(
+
+        response_body = await self._invoke_model(
             modelId=settings.BEDROCK_MODEL_ID,
             body=json.dumps(body),
         )
-        
-        response_body = json.loads(response["body"].read())
         return response_body["content"][0]["text"]
-    
+
     async def invoke_llama(
         self,
         prompt: str,
@@ -108,28 +163,24 @@ class BedrockService:
             "temperature": temperature,
         }
         
-        response = self.client.invoke_model(
+        response_body = await self._invoke_model(
             modelId=settings.BEDROCK_LLAMA_MODEL_ID,
             body=json.dumps(body),
         )
-        
-        response_body = json.loads(response["body"].read())
         return response_body["generation"]
-    
+
     async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Get embeddings using Titan Embeddings model."""
-        embeddings = []
-        
-        for text in texts:
-            body = {"inputText": text}
-            response = self.client.invoke_model(
+        # Titan embeds one text per request; fan the calls out concurrently
+        # on worker threads instead of blocking the loop once per text
+        async def _embed(text: str) -> List[float]:
+            response_body = await self._invoke_model(
                 modelId="amazon.titan-embed-text-v1",
-                body=json.dumps(body),
+                body=json.dumps({"inputText": text}),
             )
-            response_body = json.loads(response["body"].read())
-            embeddings.append(response_body["embedding"])
-        
-        return embeddings
+            return response_body["embedding"]
+
+        return list(await asyncio.gather(*(_embed(text) for text in texts)))
 
 
 def get_bedrock_service() -> BedrockService:
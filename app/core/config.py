@@ -31,6 +31,7 @@ class Settings(BaseSettings):
     
     # OpenAI (required for AI features)
     OPENAI_API_KEY: str = "placeholder-openai-key"
+    OPENAI_MAX_CONCURRENCY: int = 16
     
     # Neo4j (optional - for knowledge graph)
     NEO4J_URI: str = "bolt://localhost:7687"
@@ -52,6 +53,15 @@ class Settings(BaseSettings):
     GOOGLE_APPLICATION_CREDENTIALS: str = "credentials/gcp-service-account.json"
     GCP_SERVICE_ACCOUNT_JSON: Optional[str] = None  # JSON string from env var (for cloud deploys)
     
+    # LLM response cache (content-addressable, on disk)
+    LLM_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+
+    # Hypothesis generation
+    MAX_HYPOTHESES_PER_RUN: int = 10
+    LLM_CACHE_DIR: str = "data/llm_cache"
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
     # Processing
     MAX_PDF_SIZE_MB: int = 50
     CHUNK_SIZE: int = 1000
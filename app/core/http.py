@@ -0,0 +1,26 @@
+import httpx
+
+# Shared async HTTP client for all outbound LLM/API traffic.
+# Keep-alive plus HTTP/2 multiplexing lets concurrent gather fan-outs reuse
+# sockets instead of paying TCP + TLS setup on every call.
+_async_client = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get or create the shared httpx.AsyncClient."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            timeout=60.0,
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared client (called from the app lifespan shutdown)."""
+    global _async_client
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
@@ -0,0 +1,92 @@
+"""In-process micro-batcher for Bedrock LLM calls.
+
+Discrete awaits of ``invoke_claude`` from concurrent requests arrive at the
+backend one at a time, so it never gets a chance to batch them. The batcher
+coalesces calls landing within a short window and dispatches them in one
+concurrent gather, keeping the requests in flight together.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.bedrock import get_bedrock_service
+
+# Requests collected within FLUSH_MS of the first arrival are dispatched
+# together, up to MAX_BATCH per flush.
+MAX_BATCH = 8
+FLUSH_MS = 25
+
+
+class LLMBatcher:
+    """Coalesces concurrent invoke_claude calls into gathered dispatches."""
+
+    def __init__(self, max_batch: int = MAX_BATCH, flush_ms: int = FLUSH_MS):
+        self.max_batch = max_batch
+        self.flush_ms = flush_ms
+        self._queue: "asyncio.Queue[Tuple[Dict[str, Any], asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> str:
+        """Queue one LLM call and await its result."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((
+            {
+                "prompt": prompt,
+                "system_prompt": system_prompt,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            },
+            future,
+        ))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Give near-simultaneous callers one flush window to pile on
+            await asyncio.sleep(self.flush_ms / 1000)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Fire and track rather than await: waiting on a batch's LLM
+            # calls (seconds) would leave new arrivals queued undispatched
+            # for a full round-trip
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(
+        self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]
+    ) -> None:
+        bedrock = get_bedrock_service()
+        results = await asyncio.gather(
+            *(bedrock.invoke_claude(**kwargs) for kwargs, _ in batch),
+            return_exceptions=True,
+        )
+        for (_, future), result in zip(batch, results):
+            if future.cancelled():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+_batcher: Optional[LLMBatcher] = None
+
+
+def get_llm_batcher() -> LLMBatcher:
+    """Get or create the shared batcher instance."""
+    global _batcher
+    if _batcher is None:
+        _batcher = LLMBatcher()
+    return _batcher
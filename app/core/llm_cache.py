@@ -0,0 +1,120 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Optional
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def _cache_key(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+) -> str:
+    """Content-addressable key: identical requests hash to the same file."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "sys": system_prompt,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_cached_response(key: str) -> Optional[str]:
+    """Return the unexpired cached response for key, if one exists."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    cache_path = Path(settings.LLM_CACHE_DIR) / f"{key}.json"
+    if not cache_path.exists():
+        return None
+    try:
+        entry = json.loads(cache_path.read_text())
+        if time.time() - entry["created_at"] < entry.get("ttl", settings.LLM_CACHE_TTL_SECONDS):
+            return entry["response"]
+    except (json.JSONDecodeError, KeyError, OSError):
+        pass  # Corrupt or unreadable entry - treat as a miss and refresh
+    return None
+
+
+def store_cached_response(key: str, response: str) -> None:
+    """Persist a response under key; failures must not break the request."""
+    if not settings.LLM_CACHE_ENABLED:
+        return
+    try:
+        cache_dir = Path(settings.LLM_CACHE_DIR)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        (cache_dir / f"{key}.json").write_text(json.dumps({
+            "response": response,
+            "created_at": time.time(),
+            "ttl": settings.LLM_CACHE_TTL_SECONDS,
+        }))
+    except OSError:
+        pass
+
+
+async def cached_invoke(
+    bedrock,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+) -> str:
+    """Invoke Claude with an on-disk response cache.
+
+    The prompts built by the hypothesis agents are deterministic functions
+    of their inputs, so repeat runs over the same papers can skip the LLM
+    entirely. Disabled unless LLM_CACHE_ENABLED is set; entries expire
+    after LLM_CACHE_TTL_SECONDS.
+    """
+    key = _cache_key(settings.BEDROCK_MODEL_ID, prompt, system_prompt, max_tokens, temperature)
+    cached = load_cached_response(key)
+    if cached is not None:
+        return cached
+
+    response = await bedrock.invoke_claude(
+        prompt,
+        system_prompt=system_prompt,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+    store_cached_response(key, response)
+    return response
+
+
+async def cached_openai_invoke(
+    service,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.7,
+) -> str:
+    """Invoke an OpenAIService with the same on-disk cache as cached_invoke.
+
+    Used by the podcast pipeline, whose summary and script prompts are
+    deterministic per PDF - a regeneration of the same document replays
+    both completions instantly instead of paying two LLM round-trips.
+    """
+    key = _cache_key(service.model, prompt, system_prompt, max_tokens, temperature)
+    cached = load_cached_response(key)
+    if cached is not None:
+        return cached
+
+    response = await service.invoke(
+        prompt,
+        system_prompt=system_prompt,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+    store_cached_response(key, response)
+    return response
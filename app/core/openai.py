@@ -2,14 +2,15 @@ from functools import lru_cache
 from typing import Optional
 from openai import AsyncOpenAI
 from app.core.config import get_settings
+from app.core.http import get_async_client
 
 settings = get_settings()
 
 
 @lru_cache()
 def get_openai_client():
-    """Get cached OpenAI client."""
-    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    """Get cached OpenAI client backed by the shared pooled HTTP/2 client."""
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=get_async_client())
 
 
 class OpenAIService:
@@ -43,6 +44,33 @@ class OpenAIService:
         
         return response.choices[0].message.content
     
+    async def invoke_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ):
+        """Invoke GPT-4o-mini and yield content deltas as they stream in."""
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        messages.append({"role": "user", "content": prompt})
+
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     async def invoke_vision(
         self,
         prompt: str,
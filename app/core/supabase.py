@@ -79,6 +79,7 @@ class SupabaseService:
             return None
 
 
+@lru_cache()
 def get_supabase_service() -> SupabaseService:
-    """Get Supabase service instance."""
+    """Get cached Supabase service instance."""
     return SupabaseService()
\ No newline at end of file
@@ -0,0 +1,22 @@
+from functools import lru_cache
+import tiktoken
+
+
+@lru_cache()
+def get_encoder():
+    """Get the cached cl100k_base encoder (close proxy for Claude/GPT tokenizers)."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to at most max_tokens tokens.
+
+    Character slices over- or under-shoot the model context badly for
+    code-heavy or unicode-heavy content; LLM cost and context budgets are
+    per token, so truncate in token space.
+    """
+    encoder = get_encoder()
+    tokens = encoder.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoder.decode(tokens[:max_tokens])
@@ -34,7 +34,27 @@ logger = structlog.get_logger()
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     logger.info("Starting Cognito Backend", version=settings.APP_VERSION)
-    
+
+    # Warm the heavyweight parsing libs off the request path: tiktoken
+    # builds its BPE tables on first encode and fitz initializes MuPDF on
+    # first open, both of which otherwise land on the first user request
+    def _warm_parsers() -> None:
+        from app.core.tokens import get_encoder
+        get_encoder().encode("warm")
+
+        import fitz
+        doc = fitz.open()
+        page = doc.new_page()
+        page.get_text("text")
+        doc.close()
+
+    try:
+        import asyncio
+        await asyncio.to_thread(_warm_parsers)
+    except Exception as e:
+        logger.warning("Parser warm-up skipped", error=str(e))
+
+
     # Optional: Warm up ML models on startup (disabled by default for faster startup)
     # Uncomment if you have CUDA and required dependencies installed
     # try:
@@ -49,6 +69,10 @@ async def lifespan(app: FastAPI):
     yield
     logger.info("Shutting down Cognito Backend")
 
+    # Close the shared outbound HTTP client
+    from app.core.http import close_async_client
+    await close_async_client()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -4,6 +4,7 @@ Uses intelligent heuristic-based text extraction and understanding.
 Optimized for low-memory environments (no local ML models).
 """
 
+import asyncio
 import fitz  # PyMuPDF
 from typing import List, Dict, Any, Tuple, Optional
 import re
@@ -56,19 +57,24 @@ class MambaPDFProcessor:
                 raise ValueError(f"Expected bytes, got {type(pdf_bytes)}")
         
         logger.info(f"Opening PDF with {len(pdf_bytes)} bytes, first 4: {pdf_bytes[:4]}")
+        # Parsing is CPU-bound and synchronous inside fitz; run it on a
+        # worker thread so the event loop keeps serving other requests
+        return await asyncio.to_thread(self._extract_text_sync, pdf_bytes)
+
+    def _extract_text_sync(self, pdf_bytes: bytes) -> str:
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        
+
         if self.use_mamba:
-            text = await self._extract_with_mamba(doc)
+            text = self._extract_with_mamba(doc)
         else:
             text = ""
             for page in doc:
                 text += page.get_text()
-        
+
         doc.close()
         return text
-    
-    async def _extract_with_mamba(self, doc: fitz.Document) -> str:
+
+    def _extract_with_mamba(self, doc: fitz.Document) -> str:
         """
         Use heuristic-based processing for intelligent extraction.
         Filters headers, footers, page numbers, and focuses on main content.
@@ -211,6 +217,49 @@ class MambaPDFProcessor:
         length_score = min(len(text) / 500.0, 1.0)
         return (unique_ratio * 0.5 + length_score * 0.5)
     
+    def select_informative_text(
+        self,
+        text: str,
+        budget: int,
+        focus_area: Optional[str] = None,
+        window_size: int = 2000,
+    ) -> str:
+        """Pick the most informative windows of text within a character budget.
+
+        Splits the text into fixed-size windows, scores each with the
+        importance heuristic (plus focus-area keyword overlap when given),
+        and keeps the highest-scoring windows in document order - so long
+        documents shed their low-signal pages instead of losing everything
+        past a hard truncation point.
+        """
+        if len(text) <= budget:
+            return text
+
+        focus_words = set()
+        if focus_area:
+            focus_words = {w.lower() for w in re.findall(r'\b[A-Za-z]{4,}\b', focus_area)}
+
+        scored = []
+        for start in range(0, len(text), window_size):
+            window = text[start:start + window_size]
+            score = self._compute_importance(window)
+            if focus_words:
+                overlap = len(focus_words & set(window.lower().split()))
+                score += overlap / len(focus_words)
+            scored.append((score, start, window))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        selected = []
+        used = 0
+        for _, start, window in scored:
+            if used + len(window) > budget:
+                continue
+            selected.append((start, window))
+            used += len(window)
+
+        selected.sort()
+        return " ".join(window for _, window in selected)
+
     async def extract_key_concepts(self, pdf_bytes: bytes, top_k: int = 10) -> List[str]:
         """
         Extract key concepts from PDF using text analysis.
@@ -254,6 +303,9 @@ class MambaPDFProcessor:
     
     async def extract_metadata(self, pdf_bytes: bytes) -> Dict[str, Any]:
         """Extract metadata from a PDF."""
+        return await asyncio.to_thread(self._extract_metadata_sync, pdf_bytes)
+
+    def _extract_metadata_sync(self, pdf_bytes: bytes) -> Dict[str, Any]:
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         
         metadata = {
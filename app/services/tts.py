@@ -1,5 +1,7 @@
+import asyncio
+import hashlib
 import httpx
-from typing import List
+from typing import Dict, List
 from app.core.config import get_settings
 import base64
 import io
@@ -7,6 +9,46 @@ import io
 
 settings = get_settings()
 
+# Bound concurrent synthesis requests to stay within Sarvam rate limits
+TTS_CONCURRENCY = asyncio.Semaphore(5)
+
+# Repeated short phrases (intros, outros, stock transitions) hit this cache
+# instead of paying another synthesis round-trip
+_SPEECH_CACHE: Dict[str, bytes] = {}
+_SPEECH_CACHE_MAX_ENTRIES = 256
+_SPEECH_CACHE_MAX_TEXT_LEN = 200
+
+
+def _wav_pcm(segment: bytes) -> bytes:
+    """Extract the PCM payload from a RIFF/WAVE blob."""
+    pos = 12  # past "RIFF<size>WAVE"
+    while pos + 8 <= len(segment):
+        chunk_id = segment[pos:pos + 4]
+        size = int.from_bytes(segment[pos + 4:pos + 8], "little")
+        if chunk_id == b"data":
+            return segment[pos + 8:pos + 8 + size]
+        pos += 8 + size + (size & 1)  # chunks are word-aligned
+    return b""
+
+
+def _streaming_wav_header(template: bytes) -> bytes:
+    """Clone a segment's WAV header with unknown (0xFFFFFFFF) data length.
+
+    Players read the max sizes as "until EOF", so one header can front a
+    stream of same-format PCM payloads whose total length isn't known yet.
+    """
+    pos = 12
+    while pos + 8 <= len(template):
+        chunk_id = template[pos:pos + 4]
+        size = int.from_bytes(template[pos + 4:pos + 8], "little")
+        if chunk_id == b"data":
+            header = bytearray(template[:pos + 8])
+            header[4:8] = b"\xff\xff\xff\xff"              # RIFF size
+            header[pos + 4:pos + 8] = b"\xff\xff\xff\xff"  # data size
+            return bytes(header)
+        pos += 8 + size + (size & 1)
+    return template
+
 
 class ElevenLabsService:
     """Service for text-to-speech using Sarvam AI API."""
@@ -26,11 +68,18 @@ class ElevenLabsService:
     ) -> bytes:
         """Generate speech from text using Sarvam AI."""
         speaker = voice_id or self.voice_1
-        
+
         # Truncate text if too long (Sarvam limit is 1500 chars)
         if len(text) > 1500:
             text = text[:1497] + "..."
-        
+
+        cache_key = None
+        if len(text) <= _SPEECH_CACHE_MAX_TEXT_LEN:
+            cache_key = hashlib.sha256(f"{speaker}\x00{model_id}\x00{text}".encode()).hexdigest()
+            cached = _SPEECH_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 f"{self.base_url}/text-to-speech",
@@ -62,7 +111,12 @@ class ElevenLabsService:
                 raise Exception("No audio returned from Sarvam API")
             
             # Decode base64 to bytes
-            return base64.b64decode(audio_base64)
+            audio = base64.b64decode(audio_base64)
+            if cache_key is not None:
+                if len(_SPEECH_CACHE) >= _SPEECH_CACHE_MAX_ENTRIES:
+                    _SPEECH_CACHE.pop(next(iter(_SPEECH_CACHE)))
+                _SPEECH_CACHE[cache_key] = audio
+            return audio
     
     async def generate_dialogue(
         self,
@@ -77,23 +131,64 @@ class ElevenLabsService:
             {"speaker": 2, "text": "Hi there!"},
         ]
         """
-        audio_segments = []
-        
-        for line in script:
+        # Each line is an independent I/O-bound API call, so synthesize them
+        # concurrently (semaphore-bounded) and reassemble in script order
+        async def _synthesize(line: dict) -> bytes:
             voice = self.voice_1 if line["speaker"] == 1 else self.voice_2
-            try:
-                audio = await self.generate_speech(line["text"], voice)
-                audio_segments.append(audio)
-            except Exception as e:
-                print(f"Error generating speech for line: {e}")
+            async with TTS_CONCURRENCY:
+                return await self.generate_speech(line["text"], voice)
+
+        results = await asyncio.gather(
+            *[_synthesize(line) for line in script],
+            return_exceptions=True,
+        )
+
+        audio_segments = []
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                print(f"Error generating speech for line {i}: {result}")
                 continue
-        
+            audio_segments.append(result)
+
         if not audio_segments:
             raise Exception("No audio segments generated")
         
         # Combine audio segments
         return self._combine_audio(audio_segments)
     
+    async def stream_dialogue(self, script: List[dict]):
+        """Yield dialogue audio as one continuous WAV stream, in script order.
+
+        All lines are dispatched up front (bounded by TTS_CONCURRENCY), so
+        later segments synthesize while earlier ones are being delivered -
+        the first audio bytes reach the caller after one line's latency
+        instead of the whole episode's, and the full episode is never
+        buffered in memory at once.
+
+        Sarvam returns a complete WAV file per line; concatenating those
+        verbatim would stop standard players at the first segment's declared
+        data length. Instead one header with unknown length is emitted up
+        front and every segment contributes only its PCM payload - all
+        segments share the format requested in generate_speech.
+        """
+        async def _synthesize(line: dict) -> bytes:
+            voice = self.voice_1 if line["speaker"] == 1 else self.voice_2
+            async with TTS_CONCURRENCY:
+                return await self.generate_speech(line["text"], voice)
+
+        tasks = [asyncio.create_task(_synthesize(line)) for line in script]
+        header_sent = False
+        for i, task in enumerate(tasks):
+            try:
+                segment = await task
+            except Exception as e:
+                print(f"Error generating speech for line {i}: {e}")
+                continue
+            if not header_sent:
+                yield _streaming_wav_header(segment)
+                header_sent = True
+            yield _wav_pcm(segment)
+
     def _combine_audio(self, segments: List[bytes]) -> bytes:
         """Combine multiple audio segments into one using pydub."""
         if not segments:
@@ -0,0 +1,46 @@
+-- Atomic user-memory merge for the study loop
+-- Replaces the client-side read-modify-write in update_memory with one RPC:
+-- a single round-trip, and concurrent sessions can no longer overwrite
+-- each other's counts.
+
+DROP FUNCTION IF EXISTS update_user_memory(UUID, TEXT, TEXT) CASCADE;
+
+-- The upsert below conflicts on (user_id, memory_type); guarantee the
+-- unique constraint exists - no earlier migration defines user_memory
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_memory_user_type
+    ON public.user_memory (user_id, memory_type);
+
+CREATE OR REPLACE FUNCTION update_user_memory(
+    p_user UUID,
+    p_type TEXT,
+    p_topic TEXT
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO public.user_memory (user_id, memory_type, content, importance)
+    VALUES (
+        p_user,
+        p_type,
+        jsonb_build_object(
+            'topics', jsonb_build_array(p_topic),
+            'count', jsonb_build_object(p_topic, 1)
+        ),
+        1
+    )
+    ON CONFLICT (user_id, memory_type) DO UPDATE SET
+        content = jsonb_set(
+            jsonb_set(
+                public.user_memory.content,
+                '{topics}',
+                CASE
+                    WHEN public.user_memory.content->'topics' ? p_topic
+                        THEN public.user_memory.content->'topics'
+                    ELSE (public.user_memory.content->'topics') || to_jsonb(p_topic)
+                END
+            ),
+            ARRAY['count', p_topic],
+            to_jsonb(COALESCE((public.user_memory.content->'count'->>p_topic)::int, 0) + 1)
+        ),
+        importance = COALESCE((public.user_memory.content->'count'->>p_topic)::int, 0) + 1;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,90 @@
+-- Atomic flashcard review submission
+-- Replaces the SELECT + INSERT + UPDATE triple in /study/review with one
+-- RPC: three round-trips become one, and a crash can no longer leave a
+-- recorded review without the matching card update (or vice versa).
+-- The SM-2 math mirrors calculate_sm2 in app/api/routes/flashcards.py.
+
+DROP FUNCTION IF EXISTS fn_submit_review(UUID, UUID, INTEGER, INTEGER) CASCADE;
+
+CREATE OR REPLACE FUNCTION fn_submit_review(
+    p_card UUID,
+    p_user UUID,
+    p_quality INTEGER,
+    p_rt_ms INTEGER DEFAULT NULL
+)
+RETURNS jsonb AS $$
+DECLARE
+    v_card public.flashcards%ROWTYPE;
+    v_reps INTEGER;
+    v_ease FLOAT;
+    v_interval INTEGER;
+    v_status TEXT;
+    v_next TIMESTAMPTZ;
+BEGIN
+    SELECT * INTO v_card FROM public.flashcards
+    WHERE id = p_card AND user_id = p_user
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    IF p_quality < 3 THEN
+        -- Failed - reset repetitions
+        v_reps := 0;
+        v_interval := 1;
+        v_ease := GREATEST(1.3, v_card.ease_factor - 0.2);
+        v_status := 'learning';
+    ELSE
+        -- Successful review
+        v_reps := v_card.repetitions + 1;
+        v_ease := GREATEST(
+            1.3,
+            v_card.ease_factor + (0.1 - (5 - p_quality) * (0.08 + (5 - p_quality) * 0.02))
+        );
+
+        IF v_reps = 1 THEN
+            v_interval := 1;
+        ELSIF v_reps = 2 THEN
+            v_interval := 6;
+        ELSE
+            v_interval := FLOOR(v_card.interval_days * v_ease)::INTEGER;
+        END IF;
+
+        IF v_interval >= 21 THEN
+            v_status := 'mastered';
+        ELSIF v_reps >= 2 THEN
+            v_status := 'reviewing';
+        ELSE
+            v_status := 'learning';
+        END IF;
+    END IF;
+
+    v_next := NOW() + make_interval(days => v_interval);
+
+    INSERT INTO public.flashcard_reviews (
+        flashcard_id, user_id, quality, response_time_ms,
+        previous_interval, previous_ease_factor
+    ) VALUES (
+        p_card, p_user, p_quality, p_rt_ms,
+        v_card.interval_days, v_card.ease_factor
+    );
+
+    UPDATE public.flashcards SET
+        repetitions = v_reps,
+        ease_factor = v_ease,
+        interval_days = v_interval,
+        status = v_status,
+        next_review_date = v_next,
+        last_reviewed_at = NOW(),
+        updated_at = NOW()
+    WHERE id = p_card;
+
+    RETURN jsonb_build_object(
+        'new_status', v_status,
+        'next_review_date', v_next,
+        'interval_days', v_interval,
+        'ease_factor', ROUND(v_ease::numeric, 2)
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,75 @@
+-- Flashcard statistics in one round-trip
+-- /flashcards/stats previously streamed every card status, a week of
+-- reviews, and 30 sessions into Python just to produce a handful of
+-- integers. This RPC computes everything in Postgres, where the
+-- (user_id, next_review_date) and status indexes make the counts cheap,
+-- and returns the finished payload as jsonb.
+
+DROP FUNCTION IF EXISTS fn_flashcard_stats(UUID) CASCADE;
+
+CREATE OR REPLACE FUNCTION fn_flashcard_stats(p_user UUID)
+RETURNS jsonb AS $$
+DECLARE
+    v_total INTEGER;
+    v_new INTEGER;
+    v_learning INTEGER;
+    v_reviewing INTEGER;
+    v_mastered INTEGER;
+    v_due INTEGER;
+    v_reviews INTEGER;
+    v_correct INTEGER;
+    v_streak INTEGER;
+BEGIN
+    -- One pass over the user's cards for every per-status count
+    SELECT
+        count(*),
+        count(*) FILTER (WHERE status = 'new'),
+        count(*) FILTER (WHERE status = 'learning'),
+        count(*) FILTER (WHERE status = 'reviewing'),
+        count(*) FILTER (WHERE status = 'mastered'),
+        count(*) FILTER (WHERE next_review_date <= NOW())
+    INTO v_total, v_new, v_learning, v_reviewing, v_mastered, v_due
+    FROM public.flashcards
+    WHERE user_id = p_user;
+
+    SELECT
+        count(*),
+        count(*) FILTER (WHERE quality >= 3)
+    INTO v_reviews, v_correct
+    FROM public.flashcard_reviews
+    WHERE user_id = p_user
+      AND reviewed_at >= NOW() - interval '7 days';
+
+    -- Streak: index of the first day (counting back from today) with no
+    -- study session; capped at the same ~30-day window the client used
+    SELECT COALESCE(MIN(s.i), 31)
+    INTO v_streak
+    FROM generate_series(0, 30) AS s(i)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM public.flashcard_study_sessions fs
+        WHERE fs.user_id = p_user
+          AND fs.started_at::date = current_date - s.i
+    );
+
+    RETURN jsonb_build_object(
+        'total_cards', v_total,
+        'status_counts', jsonb_build_object(
+            'new', v_new,
+            'learning', v_learning,
+            'reviewing', v_reviewing,
+            'mastered', v_mastered
+        ),
+        'due_today', v_due,
+        'mastery_percentage',
+            CASE WHEN v_total > 0
+                 THEN ROUND(v_mastered::numeric / v_total * 100, 1)
+                 ELSE 0 END,
+        'weekly_reviews', v_reviews,
+        'weekly_accuracy',
+            CASE WHEN v_reviews > 0
+                 THEN ROUND(v_correct::numeric / v_reviews * 100, 1)
+                 ELSE 0 END,
+        'study_streak', v_streak
+    );
+END;
+$$ LANGUAGE plpgsql;
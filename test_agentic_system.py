@@ -20,16 +20,16 @@ from app.agents.tools import (
 from app.agents.hypothesis_agent_agentic import generate_hypotheses_agentic
 
 
-def test_tools():
+async def test_tools():
     """Test individual tools."""
     print("=" * 60)
     print("TESTING INDIVIDUAL TOOLS")
     print("=" * 60)
-    
+
     # Test 1: ArXiv Search
     print("\n1️⃣  Testing ArXiv Search...")
     try:
-        result = search_arxiv.invoke({"query": "machine learning", "max_results": 2})
+        result = await search_arxiv.ainvoke({"query": "machine learning", "max_results": 2})
         if result and len(result) > 0:
             print(f"   ✅ Found {len(result)} papers on ArXiv")
             print(f"   📄 Sample: {result[0].get('title', 'N/A')[:60]}...")
@@ -41,7 +41,7 @@ def test_tools():
     # Test 2: Semantic Scholar Search
     print("\n2️⃣  Testing Semantic Scholar...")
     try:
-        result = search_semantic_scholar.invoke({"query": "deep learning", "limit": 2})
+        result = await search_semantic_scholar.ainvoke({"query": "deep learning", "limit": 2})
         if result and len(result) > 0:
             print(f"   ✅ Found {len(result)} papers on Semantic Scholar")
             if "error" not in result[0]:
@@ -54,7 +54,7 @@ def test_tools():
     # Test 3: Novelty Check
     print("\n3️⃣  Testing Novelty Checker...")
     try:
-        result = check_hypothesis_novelty.invoke({
+        result = await check_hypothesis_novelty.ainvoke({
             "hypothesis": "Combining transformers with reinforcement learning"
         })
         if result and "novelty_score" in result:
@@ -68,7 +68,7 @@ def test_tools():
     # Test 4: Testability Scorer
     print("\n4️⃣  Testing Testability Scorer...")
     try:
-        result = score_hypothesis_testability.invoke({
+        result = await score_hypothesis_testability.ainvoke({
             "hypothesis": "Increasing dataset size will improve model accuracy by 10%",
             "methodology": ["A/B testing", "Statistical analysis"]
         })
@@ -83,7 +83,7 @@ def test_tools():
     # Test 5: Statistical Validator
     print("\n5️⃣  Testing Statistical Validator...")
     try:
-        result = validate_statistical_claim.invoke({
+        result = await validate_statistical_claim.ainvoke({
             "claim": "The correlation between X and Y is significant at p<0.05",
             "data_description": "Randomized controlled trial with n=100"
         })
@@ -188,9 +188,10 @@ def main():
     print("AGENTIC HYPOTHESIS LAB - SYSTEM TEST")
     print("🚀" * 30)
     
-    # Test tools
-    test_tools()
-    
+    # Test tools (async-only now - LangChain raises NotImplementedError
+    # on sync .invoke when a tool only provides a coroutine)
+    asyncio.run(test_tools())
+
     # Test agentic workflow
     asyncio.run(test_agentic_workflow())
     
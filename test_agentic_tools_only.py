@@ -60,7 +60,7 @@ async def test_tools():
     # Test 1: ArXiv Search
     print("\n1. Testing ArXiv Search...")
     try:
-        result = search_arxiv.invoke({"query": "attention mechanism transformer", "max_results": 2})
+        result = await search_arxiv.ainvoke({"query": "attention mechanism transformer", "max_results": 2})
         print(f"   ✓ Found {len(result.get('papers', []))} papers")
         if result.get("papers"):
             print(f"   → First paper: {result['papers'][0]['title'][:60]}...")
@@ -70,7 +70,7 @@ async def test_tools():
     # Test 2: Semantic Scholar
     print("\n2. Testing Semantic Scholar...")
     try:
-        result = search_semantic_scholar.invoke({"query": "transformer neural networks", "limit": 2})
+        result = await search_semantic_scholar.ainvoke({"query": "transformer neural networks", "limit": 2})
         print(f"   ✓ Found {len(result.get('papers', []))} papers")
         if result.get("papers"):
             print(f"   → First paper: {result['papers'][0]['title'][:60]}...")
@@ -80,7 +80,7 @@ async def test_tools():
     # Test 3: Hypothesis Novelty Check
     print("\n3. Testing Hypothesis Novelty Check...")
     try:
-        result = check_hypothesis_novelty.invoke({
+        result = await check_hypothesis_novelty.ainvoke({
             "hypothesis": "Attention mechanisms improve transformer performance"
         })
         print(f"   ✓ Novelty score: {result.get('novelty_score', 0):.2f}")
@@ -91,7 +91,7 @@ async def test_tools():
     # Test 4: Find Related Concepts
     print("\n4. Testing Find Related Concepts...")
     try:
-        result = find_related_concepts.invoke({"concept": "attention mechanism"})
+        result = await find_related_concepts.ainvoke({"concept": "attention mechanism"})
         concepts = result.get("concepts", [])
         print(f"   ✓ Found {len(concepts)} related concepts")
         print(f"   → Concepts: {', '.join(concepts[:5])}")
@@ -101,7 +101,7 @@ async def test_tools():
     # Test 5: Testability Scoring
     print("\n5. Testing Hypothesis Testability Scoring...")
     try:
-        result = score_hypothesis_testability.invoke({
+        result = await score_hypothesis_testability.ainvoke({
             "hypothesis": "Increasing model size by 10x improves accuracy by 5%",
             "methodology": "Train models at different scales and measure accuracy on benchmark",
         })
@@ -113,7 +113,7 @@ async def test_tools():
     # Test 6: Statistical Validation
     print("\n6. Testing Statistical Claim Validation...")
     try:
-        result = validate_statistical_claim.invoke({
+        result = await validate_statistical_claim.ainvoke({
             "claim": "Model A achieves 95% accuracy (p<0.05)",
             "data_description": "Tested on 1000 samples with 5-fold cross-validation",
         })
@@ -125,7 +125,7 @@ async def test_tools():
     # Test 7: Python Code Execution
     print("\n7. Testing Python Code Execution...")
     try:
-        result = execute_python_code.invoke({"code": "import numpy as np\nprint(np.mean([1, 2, 3, 4, 5]))"})
+        result = await execute_python_code.ainvoke({"code": "import numpy as np\nprint(np.mean([1, 2, 3, 4, 5]))"})
         print(f"   ✓ Success: {result.get('success', False)}")
         print(f"   → Output: {result.get('output', 'No output').strip()}")
     except Exception as e:
@@ -134,7 +134,7 @@ async def test_tools():
     # Test 8: Research Feasibility
     print("\n8. Testing Research Feasibility Analysis...")
     try:
-        result = analyze_research_feasibility.invoke({
+        result = await analyze_research_feasibility.ainvoke({
             "hypothesis": "Train a 100B parameter model to test scaling laws",
             "required_resources": "1000 GPUs, 6 months, $10M budget",
             "timeframe": "6 months",